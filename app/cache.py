@@ -1,40 +1,76 @@
 """In-memory response cache with TTL for AI Gateway."""
+import asyncio
 import hashlib
 import json
+import os
+import re
 import time
 import logging
 from typing import Optional, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+_WS_RE = re.compile(r"\s+")
+
+
+def _normalize_text(text: str) -> str:
+    """Collapse whitespace runs for key derivation only.
+
+    Catches the trivial near-duplicates (trailing newlines, double spaces,
+    re-wrapped prompts) that would otherwise miss the exact-match cache.
+    Stored responses are untouched.
+    """
+    return _WS_RE.sub(" ", text).strip()
+
 
 class ResponseCache:
-    """Simple in-memory cache with TTL (Time-To-Live)."""
+    """Simple in-memory cache with TTL (Time-To-Live).
+
+    Only near-deterministic requests are cached: above `max_temperature`
+    the provider is expected to sample a different completion each time,
+    so serving a stored one would change semantics, not just latency.
+    """
 
-    def __init__(self, default_ttl: int = 3600, max_size: int = 1000):
+    def __init__(self, default_ttl: int = 3600, max_size: int = 1000,
+                 max_temperature: float = 0.3):
         self._cache: Dict[str, Dict[str, Any]] = {}
         self.default_ttl = default_ttl  # seconds
         self.max_size = max_size
+        self.max_temperature = max_temperature
         self.hits = 0
         self.misses = 0
+        # Identical requests currently being answered: a burst of N
+        # duplicates collapses to one provider round-trip, the rest await
+        # the owner's future. Single event loop — no locking needed.
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
 
-    def _make_key(self, provider: str, messages: list, system_prompt: Optional[str],
-                  max_tokens: int, temperature: float) -> str:
+    def _make_key(self, provider: str, model: str, messages: list,
+                  system_prompt: Optional[str], max_tokens: int,
+                  temperature: float) -> str:
         """Create a deterministic cache key from request parameters."""
         key_data = {
             "provider": provider,
-            "messages": messages,
-            "system_prompt": system_prompt or "",
+            "model": model,
+            "messages": [
+                {**msg, "content": _normalize_text(msg["content"])}
+                if isinstance(msg.get("content"), str) else msg
+                for msg in messages
+            ],
+            "system_prompt": _normalize_text(system_prompt or ""),
             "max_tokens": max_tokens,
             "temperature": temperature
         }
         key_str = json.dumps(key_data, sort_keys=True, ensure_ascii=False)
         return hashlib.sha256(key_str.encode()).hexdigest()
 
-    def get(self, provider: str, messages: list, system_prompt: Optional[str],
-            max_tokens: int, temperature: float) -> Optional[Dict[str, Any]]:
+    def get(self, provider: str, model: str, messages: list,
+            system_prompt: Optional[str], max_tokens: int,
+            temperature: float) -> Optional[Dict[str, Any]]:
         """Get cached response if exists and not expired."""
-        key = self._make_key(provider, messages, system_prompt, max_tokens, temperature)
+        if temperature > self.max_temperature:
+            return None
+        key = self._make_key(provider, model, messages, system_prompt, max_tokens, temperature)
         entry = self._cache.get(key)
 
         if entry is None:
@@ -50,16 +86,19 @@ class ResponseCache:
         logger.info(f"[CACHE HIT] provider={provider}, key={key[:12]}...")
         return entry["data"]
 
-    def set(self, provider: str, messages: list, system_prompt: Optional[str],
-            max_tokens: int, temperature: float, data: Dict[str, Any],
-            ttl: Optional[int] = None):
+    def set(self, provider: str, model: str, messages: list,
+            system_prompt: Optional[str], max_tokens: int, temperature: float,
+            data: Dict[str, Any], ttl: Optional[int] = None):
         """Store a response in the cache."""
+        if temperature > self.max_temperature:
+            return
+
         # Evict oldest entries if at capacity
         if len(self._cache) >= self.max_size:
             oldest_key = min(self._cache, key=lambda k: self._cache[k]["created_at"])
             del self._cache[oldest_key]
 
-        key = self._make_key(provider, messages, system_prompt, max_tokens, temperature)
+        key = self._make_key(provider, model, messages, system_prompt, max_tokens, temperature)
         self._cache[key] = {
             "data": data,
             "created_at": time.time(),
@@ -67,6 +106,39 @@ class ResponseCache:
         }
         logger.info(f"[CACHE SET] provider={provider}, key={key[:12]}...")
 
+    def begin_inflight(self, provider: str, model: str, messages: list,
+                       system_prompt: Optional[str], max_tokens: int,
+                       temperature: float):
+        """Claim or join the in-flight slot for this request.
+
+        Returns (key, None) when the caller becomes the owner and must
+        later call end_inflight with the outcome; (None, future) when an
+        identical request is already running and the caller should await
+        the future; (None, None) when coalescing doesn't apply (the same
+        determinism ceiling as caching).
+        """
+        if temperature > self.max_temperature:
+            return None, None
+        key = self._make_key(provider, model, messages, system_prompt, max_tokens, temperature)
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return None, fut
+        self._inflight[key] = asyncio.get_running_loop().create_future()
+        return key, None
+
+    def end_inflight(self, key: str, result: Optional[Dict[str, Any]] = None,
+                     error: Optional[BaseException] = None):
+        """Resolve and release the slot claimed by begin_inflight."""
+        fut = self._inflight.pop(key, None)
+        if fut is None or fut.done():
+            return
+        if error is not None:
+            fut.set_exception(error)
+            fut.exception()  # mark retrieved in case nobody joined
+        else:
+            fut.set_result(result)
+
     def clear(self):
         """Clear all cached entries."""
         self._cache.clear()
@@ -83,11 +155,18 @@ class ResponseCache:
             "expired_entries": len(self._cache) - active,
             "hits": self.hits,
             "misses": self.misses,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
             "hit_rate": round(self.hits / max(self.hits + self.misses, 1) * 100, 1),
             "max_size": self.max_size,
-            "default_ttl": self.default_ttl
+            "default_ttl": self.default_ttl,
+            "max_temperature": self.max_temperature
         }
 
 
 # Global cache instance
-response_cache = ResponseCache(default_ttl=3600, max_size=1000)
+response_cache = ResponseCache(
+    default_ttl=3600,
+    max_size=1000,
+    max_temperature=float(os.getenv("AI_CACHE_MAX_TEMPERATURE", "0.3")),
+)
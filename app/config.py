@@ -1,5 +1,9 @@
+import atexit
 import os
 import json
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
 from urllib.parse import urlparse
@@ -14,6 +18,11 @@ DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).parent / "data"))
 DATA_DIR.mkdir(exist_ok=True)
 DB_FILE = DATA_DIR / "config.db"
 CONFIG_FILE = DATA_DIR / "ai-config.json"
+# Sentinel touched on every config save. The in-process cache invalidates on
+# this file's mtime rather than the DB's: usage_logs shares config.db, so
+# statting the DB/WAL would see every log_usage commit as a "config change"
+# and reload the providers on roughly every chat request.
+STAMP_FILE = DATA_DIR / "config.stamp"
 
 # Determine database type
 USE_POSTGRES = DATABASE_URL is not None
@@ -49,10 +58,82 @@ def _get_pg_connection():
         raise
 
 
+# Long-lived SQLite connection. Opening/closing a handle per call runs file
+# I/O and rebuilds the page cache from scratch — useless work for a gateway
+# that reads config constantly. Callers must NOT close() this connection,
+# and every statement+commit on it must run under _SQLITE_WRITE_LOCK: it is
+# shared between the event loop and the debounce timer thread, and the two
+# share one transaction context — an unlocked commit from one thread splits
+# the other's open transaction. PostgreSQL connections are still
+# opened/closed per call.
+_SQLITE_CONN = None
+_SQLITE_WRITE_LOCK = threading.Lock()
+
+
 def _get_sqlite_connection():
-    """Get SQLite connection"""
+    """Get the shared long-lived SQLite connection (created on first use)"""
+    global _SQLITE_CONN
+    if _SQLITE_CONN is None:
+        import sqlite3
+        conn = sqlite3.connect(str(DB_FILE), check_same_thread=False)
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.execute("PRAGMA temp_store=memory")
+        cursor.execute("PRAGMA cache_size=-20000")
+        _SQLITE_CONN = conn
+    return _SQLITE_CONN
+
+
+# Read/write split for SQLite: writes go through the single shared
+# connection above (BEGIN IMMEDIATE under _SQLITE_WRITE_LOCK); reads check
+# out read-only connections from a small pool so parallel lookups under
+# batch-chat load don't serialize behind a settings write (WAL allows
+# N readers + 1 writer).
+_READ_POOL = None
+_READ_POOL_LOCK = threading.Lock()
+_READ_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+
+
+def _open_read_connection():
+    """Open a read-only SQLite connection tuned like the shared handle"""
     import sqlite3
-    return sqlite3.connect(str(DB_FILE))
+    conn = sqlite3.connect(f"file:{DB_FILE}?mode=ro", uri=True, check_same_thread=False)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute("PRAGMA temp_store=memory")
+    cursor.execute("PRAGMA cache_size=-20000")
+    return conn
+
+
+def _get_read_pool():
+    global _READ_POOL
+    if _READ_POOL is None:
+        with _READ_POOL_LOCK:
+            if _READ_POOL is None:
+                pool = queue.Queue(maxsize=_READ_POOL_SIZE)
+                for _ in range(_READ_POOL_SIZE):
+                    pool.put(_open_read_connection())
+                _READ_POOL = pool
+    return _READ_POOL
+
+
+@contextmanager
+def _read_connection():
+    """Check a read-only connection out of the pool (returned on exit)"""
+    pool = _get_read_pool()
+    try:
+        conn = pool.get(timeout=5.0)
+    except queue.Empty:
+        conn = _open_read_connection()  # pool exhausted — use a throwaway
+    try:
+        yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
 
 
 def init_db():
@@ -85,37 +166,40 @@ def init_db():
         conn.commit()
         conn.close()
     else:
-        import sqlite3
-        conn = sqlite3.connect(str(DB_FILE))
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS providers (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                api_key TEXT NOT NULL,
-                model TEXT NOT NULL,
-                base_url TEXT NOT NULL,
-                enabled INTEGER DEFAULT 1,
-                service_type TEXT DEFAULT 'chat'
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
-        # Add service_type column if not exists (migration)
-        try:
-            cursor.execute("ALTER TABLE providers ADD COLUMN service_type TEXT DEFAULT 'chat'")
-        except Exception:
-            pass  # Column already exists
-        conn.commit()
-        conn.close()
-
-
-def _get_default_providers():
-    """Get default provider configurations from environment or defaults"""
+        with _SQLITE_WRITE_LOCK:
+            conn = _get_sqlite_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS providers (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    api_key TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    base_url TEXT NOT NULL,
+                    enabled INTEGER DEFAULT 1,
+                    service_type TEXT DEFAULT 'chat'
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            # Add service_type column if not exists (migration)
+            try:
+                cursor.execute("ALTER TABLE providers ADD COLUMN service_type TEXT DEFAULT 'chat'")
+            except Exception:
+                pass  # Column already exists
+            conn.commit()
+        # Make sure the config-save sentinel exists so writers (including
+        # other processes on the same DATA_DIR) have something to touch.
+        if not STAMP_FILE.exists():
+            STAMP_FILE.touch()
+
+
+def _build_default_providers():
+    """Build default provider configurations from environment or defaults"""
     return {
         "claude-sonnet": ProviderConfig(
             name="Claude Sonnet (Anthropic)",
@@ -211,49 +295,70 @@ def _get_default_providers():
     }
 
 
+# Defaults are built once at import — first-run and admin reset flows
+# shouldn't re-scan the environment and re-validate a dozen models each time.
+_DEFAULT_PROVIDERS = _build_default_providers()
+
+
+def _get_default_providers():
+    """Get a mutable copy of the default provider configurations"""
+    return {pid: p.model_copy() for pid, p in _DEFAULT_PROVIDERS.items()}
+
+
+def reload_defaults() -> None:
+    """Re-read environment variables into the default provider template"""
+    global _DEFAULT_PROVIDERS
+    _DEFAULT_PROVIDERS = _build_default_providers()
+
+
 def _load_from_db() -> Optional[AIConfig]:
     """Load configuration from database (PostgreSQL or SQLite)"""
     try:
         if USE_POSTGRES:
             conn = _get_pg_connection()
+            try:
+                return _read_config(conn)
+            finally:
+                conn.close()
         else:
             if not DB_FILE.exists():
                 return None
-            conn = _get_sqlite_connection()
+            with _read_connection() as conn:
+                return _read_config(conn)
+    except Exception as e:
+        print(f"[CONFIG] Error loading from DB: {e}")
+        return None
 
-        cursor = conn.cursor()
 
-        # Check if providers table has data
-        cursor.execute("SELECT COUNT(*) FROM providers")
-        count = cursor.fetchone()[0]
+def _read_config(conn) -> Optional[AIConfig]:
+    """Read providers + settings rows from an open connection"""
+    cursor = conn.cursor()
 
-        if count == 0:
-            conn.close()
-            return None
-
-        # Load providers
-        cursor.execute("SELECT id, name, api_key, model, base_url, enabled, service_type FROM providers")
-        providers = {}
-        for row in cursor.fetchall():
-            providers[row[0]] = ProviderConfig(
-                name=row[1],
-                api_key=row[2],
-                model=row[3],
-                base_url=row[4],
-                enabled=bool(row[5]),
-                service_type=row[6] or "chat"
-            )
+    # Load providers; an empty table means "no config yet" — no separate
+    # COUNT(*) probe needed.
+    cursor.execute("SELECT id, name, api_key, model, base_url, enabled, service_type FROM providers")
+    rows = cursor.fetchall()
+    if not rows:
+        return None
 
-        # Load default provider
-        cursor.execute("SELECT value FROM settings WHERE key = 'default_provider'")
-        result = cursor.fetchone()
-        default_provider = result[0] if result else "claude"
+    providers = {}
+    for row in rows:
+        # Rows come from our own DB — model_construct skips validation
+        providers[row[0]] = ProviderConfig.model_construct(
+            name=row[1],
+            api_key=row[2],
+            model=row[3],
+            base_url=row[4],
+            enabled=bool(row[5]),
+            service_type=row[6] or "chat"
+        )
 
-        conn.close()
-        return AIConfig(providers=providers, default_provider=default_provider)
-    except Exception as e:
-        print(f"[CONFIG] Error loading from DB: {e}")
-        return None
+    # Load default provider
+    cursor.execute("SELECT value FROM settings WHERE key = 'default_provider'")
+    result = cursor.fetchone()
+    default_provider = result[0] if result else "claude"
+
+    return AIConfig(providers=providers, default_provider=default_provider)
 
 
 def _save_to_db(config: AIConfig):
@@ -262,40 +367,52 @@ def _save_to_db(config: AIConfig):
 
     if USE_POSTGRES:
         conn = _get_pg_connection()
+        _write_config(conn, config)
+        conn.close()
     else:
-        conn = _get_sqlite_connection()
+        with _SQLITE_WRITE_LOCK:
+            _write_config(_get_sqlite_connection(), config)
+        STAMP_FILE.touch()  # signal other processes' config caches
 
+
+def _write_config(conn, config: AIConfig):
+    """Write providers + settings to an open connection in one transaction"""
     cursor = conn.cursor()
 
-    # Clear and insert providers
-    cursor.execute("DELETE FROM providers")
-    for provider_id, provider in config.providers.items():
-        if USE_POSTGRES:
-            cursor.execute('''
-                INSERT INTO providers (id, name, api_key, model, base_url, enabled, service_type)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            ''', (provider_id, provider.name, provider.api_key, provider.model,
-                  provider.base_url, 1 if provider.enabled else 0, provider.service_type))
-        else:
-            cursor.execute('''
-                INSERT INTO providers (id, name, api_key, model, base_url, enabled, service_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (provider_id, provider.name, provider.api_key, provider.model,
-                  provider.base_url, 1 if provider.enabled else 0, provider.service_type))
+    rows = [
+        (provider_id, provider.name, provider.api_key, provider.model,
+         provider.base_url, 1 if provider.enabled else 0, provider.service_type)
+        for provider_id, provider in config.providers.items()
+    ]
 
-    # Save default provider
     if USE_POSTGRES:
+        cursor.execute("DELETE FROM providers")
+        cursor.executemany('''
+            INSERT INTO providers (id, name, api_key, model, base_url, enabled, service_type)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ''', rows)
         cursor.execute('''
             INSERT INTO settings (key, value) VALUES ('default_provider', %s)
             ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
         ''', (config.default_provider,))
+        conn.commit()
     else:
-        cursor.execute('''
-            INSERT OR REPLACE INTO settings (key, value) VALUES ('default_provider', ?)
-        ''', (config.default_provider,))
-
-    conn.commit()
-    conn.close()
+        # One explicit transaction: a single fsync for the whole save instead
+        # of one per statement, and the DELETE+INSERT pair stays atomic.
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("DELETE FROM providers")
+            cursor.executemany('''
+                INSERT INTO providers (id, name, api_key, model, base_url, enabled, service_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            cursor.execute('''
+                INSERT OR REPLACE INTO settings (key, value) VALUES ('default_provider', ?)
+            ''', (config.default_provider,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
 
 
 def _load_from_json() -> Optional[AIConfig]:
@@ -316,12 +433,49 @@ def _load_from_json() -> Optional[AIConfig]:
     )
 
 
+# In-process config cache. The parsed AIConfig is loaded once and kept in
+# memory — hitting the DB on every /chat request is pure overhead for a
+# request-routing gateway. Writers replace the cache with the new config
+# (never set it to None) so readers never miss. For SQLite, staleness from
+# config writes by *other* processes is detected with a single stat() of
+# the save sentinel; statting the DB itself would also pick up usage_logs
+# commits, which share the file but never change the config.
+_CONFIG_CACHE: Optional[AIConfig] = None
+_CONFIG_CACHE_MTIME: Optional[int] = None
+_CONFIG_LOCK = threading.Lock()
+
+
+def _config_stamp_ns() -> Optional[int]:
+    """st_mtime_ns of the config-save sentinel (None for PostgreSQL)"""
+    if USE_POSTGRES:
+        return None
+    try:
+        return os.stat(STAMP_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+
 def load_config() -> AIConfig:
-    """Load AI configuration with fallback chain:
+    """Load AI configuration (cached in-process, mtime-invalidated).
+
+    First load follows the fallback chain:
     1. Database (PostgreSQL or SQLite)
     2. JSON file (legacy/development)
     3. Environment variables (initial setup)
     """
+    global _CONFIG_CACHE, _CONFIG_CACHE_MTIME
+    if _CONFIG_CACHE is not None and _config_stamp_ns() == _CONFIG_CACHE_MTIME:
+        return _CONFIG_CACHE
+    with _CONFIG_LOCK:
+        mtime = _config_stamp_ns()
+        if _CONFIG_CACHE is None or mtime != _CONFIG_CACHE_MTIME:
+            _CONFIG_CACHE = _load_config_uncached()
+            _CONFIG_CACHE_MTIME = _config_stamp_ns()
+        return _CONFIG_CACHE
+
+
+def _load_config_uncached() -> AIConfig:
+    """Load AI configuration from the backing store (no cache)."""
     init_db()
 
     # Try loading from database first
@@ -378,9 +532,97 @@ def load_config() -> AIConfig:
     return default_config
 
 
+# Callbacks fired after every config write — lets callers holding derived
+# caches (e.g. per-provider service instances) invalidate without importing
+# this module's internals.
+_CONFIG_CHANGE_HOOKS = []
+
+
+def on_config_change(callback) -> None:
+    """Register a zero-arg callback invoked after each config write"""
+    _CONFIG_CHANGE_HOOKS.append(callback)
+
+
+def _notify_config_change() -> None:
+    for callback in _CONFIG_CHANGE_HOOKS:
+        try:
+            callback()
+        except Exception as e:
+            print(f"[CONFIG] Config change hook failed: {e}")
+
+
+# Write coalescing. Dashboard "save" flows issue several PUTs back to back,
+# and each save rewrites every provider row in one fsynced transaction. The
+# in-process cache is updated immediately (read-your-writes), while the DB
+# flush is debounced so N rapid saves cost one transaction. Set
+# CONFIG_WRITE_DELAY=0 to flush synchronously.
+_WRITE_DELAY_SECS = float(os.getenv("CONFIG_WRITE_DELAY", "0.2"))
+_PENDING_CONFIG: Optional[AIConfig] = None
+_PENDING_TIMER: Optional[threading.Timer] = None
+_PENDING_LOCK = threading.Lock()
+
+
+def _flush_pending_config() -> None:
+    global _CONFIG_CACHE_MTIME, _PENDING_CONFIG, _PENDING_TIMER
+    with _PENDING_LOCK:
+        config = _PENDING_CONFIG
+        _PENDING_CONFIG = None
+        _PENDING_TIMER = None
+    if config is None:
+        return
+    try:
+        _save_to_db(config)
+    except Exception as e:
+        # Don't drop the save: put it back (unless a newer one arrived in
+        # the meantime) and retry on a fresh timer tick.
+        print(f"[CONFIG] Coalesced save failed, re-queueing: {e}")
+        with _PENDING_LOCK:
+            if _PENDING_CONFIG is None:
+                _PENDING_CONFIG = config
+                _PENDING_TIMER = threading.Timer(
+                    max(_WRITE_DELAY_SECS, 1.0), _flush_pending_config)
+                _PENDING_TIMER.daemon = True
+                _PENDING_TIMER.start()
+        return
+    _CONFIG_CACHE_MTIME = _config_stamp_ns()
+
+
+def flush_config_writes() -> None:
+    """Write any coalesced config save to the database immediately"""
+    with _PENDING_LOCK:
+        timer = _PENDING_TIMER
+    if timer is not None:
+        timer.cancel()
+    _flush_pending_config()
+
+
+# Don't lose a pending write if the process exits inside the debounce window.
+atexit.register(flush_config_writes)
+
+
 def save_config(config: AIConfig) -> None:
-    """Save AI configuration to database"""
-    _save_to_db(config)
+    """Save AI configuration and refresh the in-process cache.
+
+    The cache (and change hooks) update immediately; the database write is
+    coalesced — a save arriving within the debounce window replaces the
+    pending one and restarts the timer.
+    """
+    global _CONFIG_CACHE, _CONFIG_CACHE_MTIME, _PENDING_CONFIG, _PENDING_TIMER
+    _CONFIG_CACHE = config
+    _notify_config_change()
+
+    if _WRITE_DELAY_SECS <= 0:
+        _save_to_db(config)
+        _CONFIG_CACHE_MTIME = _config_stamp_ns()
+        return
+
+    with _PENDING_LOCK:
+        _PENDING_CONFIG = config
+        if _PENDING_TIMER is not None:
+            _PENDING_TIMER.cancel()
+        _PENDING_TIMER = threading.Timer(_WRITE_DELAY_SECS, _flush_pending_config)
+        _PENDING_TIMER.daemon = True
+        _PENDING_TIMER.start()
 
 
 def get_provider(provider_id: str) -> Optional[ProviderConfig]:
@@ -389,6 +631,17 @@ def get_provider(provider_id: str) -> Optional[ProviderConfig]:
     return config.providers.get(provider_id)
 
 
+def resolve_provider(provider_id: Optional[str] = None) -> tuple[str, Optional[ProviderConfig]]:
+    """Resolve a provider id (falling back to the default) and its config.
+
+    One cache read instead of the load_config + get_provider pair the chat
+    path used to do.
+    """
+    config = load_config()
+    resolved_id = provider_id or config.default_provider
+    return resolved_id, config.providers.get(resolved_id)
+
+
 def update_provider(provider_id: str, updates: dict) -> ProviderConfig:
     """Update a specific provider configuration"""
     config = load_config()
@@ -423,5 +676,50 @@ def reset_providers():
         providers=_get_default_providers(),
         default_provider="claude-sonnet"
     )
-    _save_to_db(default_config)
+    save_config(default_config)
     return default_config
+
+
+# Settings-table accessors for the routers' per-key defaults (default STT /
+# image / image-edit provider). Centralized so every caller shares the same
+# connection discipline: reads go through the read-only pool, writes take
+# _SQLITE_WRITE_LOCK like config saves do.
+
+
+def read_setting(key: str) -> Optional[str]:
+    """Read one value from the settings table (None if unset)"""
+    if USE_POSTGRES:
+        conn = _get_pg_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM settings WHERE key = %s", (key,))
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+    else:
+        with _read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
+            row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def write_setting(key: str, value: str) -> None:
+    """Upsert one value in the settings table"""
+    if USE_POSTGRES:
+        conn = _get_pg_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO settings (key, value) VALUES (%s, %s)
+            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+        ''', (key, value))
+        conn.commit()
+        conn.close()
+    else:
+        with _SQLITE_WRITE_LOCK:
+            conn = _get_sqlite_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+            conn.commit()
@@ -1,14 +1,24 @@
+import logging
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse, Response
 from pathlib import Path
 from contextlib import asynccontextmanager
 
 from .routers import ai_router, settings_router, stt_router, image_router
-from .config import init_db, load_config
+from .services import aclose_services
+from .services.http import prewarm
+from .config import init_db, load_config, flush_config_writes
 from .usage import init_usage_table
 
+# Configure logging once for the whole app. Per-request DEBUG logging on the
+# chat hot path costs formatting + stream writes; default to INFO and let
+# deployments opt into more via LOG_LEVEL.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+
 
 _RISKY_MODEL_PATTERNS = ("-preview", "-exp", "-experimental")
 
@@ -31,9 +41,19 @@ def _audit_provider_models(config) -> None:
             print(f"[STARTUP OK]   {pid}: {p.model}")
 
 
+# Admin dashboard, read into memory at startup so "/" doesn't stat + open
+# the file on every hit (the dashboard polls).
+_admin_bytes = None
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize database on startup"""
+    global _admin_bytes
+    admin_file = frontend_path / "admin.html"
+    if admin_file.exists():
+        _admin_bytes = admin_file.read_bytes()
+
     print("[STARTUP] Initializing database...")
     try:
         init_db()
@@ -41,10 +61,20 @@ async def lifespan(app: FastAPI):
         config = load_config()
         print(f"[STARTUP] Loaded {len(config.providers)} providers")
         _audit_provider_models(config)
+        # Warm keep-alive connections for providers on the shared pool so
+        # the first user-visible call skips the TLS handshake. Claude and
+        # the SDK-backed services manage their own pools.
+        await prewarm(
+            p.base_url
+            for pid, p in config.providers.items()
+            if pid in ("moonshot", "perplexity") and p.enabled and p.api_key
+        )
     except Exception as e:
         print(f"[STARTUP ERROR] Database initialization failed: {e}")
         print("[STARTUP] Continuing without database - will use environment defaults")
     yield
+    flush_config_writes()
+    await aclose_services()
     print("[SHUTDOWN] AI Gateway shutting down")
 
 
@@ -52,16 +82,21 @@ app = FastAPI(
     title="AI Gateway",
     description="Centralized AI service management for multiple applications",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson serializes response bodies 3-10x faster than stdlib json,
+    # which matters for the chat endpoints returning long completions.
+    default_response_class=ORJSONResponse,
 )
 
-# CORS middleware
+# CORS middleware. Wildcard origins can't be combined with credentials per
+# the CORS spec, and enumerating methods/headers lets the middleware answer
+# preflights without expanding "*" per request.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, specify exact origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_credentials=False,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["content-type", "authorization"],
 )
 
 # Include routers
@@ -73,15 +108,23 @@ app.include_router(image_router)
 # Serve static files (frontend)
 frontend_path = Path(__file__).parent.parent / "frontend"
 if frontend_path.exists():
-    app.mount("/static", StaticFiles(directory=str(frontend_path)), name="static")
+    # check_dir=False: the directory was just verified, skip the re-check
+    app.mount(
+        "/static",
+        StaticFiles(directory=str(frontend_path), html=True, check_dir=False),
+        name="static",
+    )
 
 
 @app.get("/")
 async def root():
-    """Serve the admin dashboard"""
-    admin_file = frontend_path / "admin.html"
-    if admin_file.exists():
-        return FileResponse(str(admin_file))
+    """Serve the admin dashboard (cached in memory at startup)"""
+    if _admin_bytes is not None:
+        return Response(
+            content=_admin_bytes,
+            media_type="text/html",
+            headers={"Cache-Control": "public, max-age=60"},
+        )
     return {"message": "AI Gateway is running", "docs": "/docs"}
 
 
@@ -92,5 +135,12 @@ async def health_check():
 
 
 if __name__ == "__main__":
+    # uvloop cuts per-await overhead roughly in half on this I/O-bound
+    # proxy; uvicorn[standard] ships it, but install() covers direct runs.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=9000)
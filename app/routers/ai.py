@@ -1,29 +1,21 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Dict, Optional, Any
 import asyncio
 import json
+import logging
 import os
 import re
 import time
-import traceback
 
-from ..config import load_config, get_provider
+from ..config import load_config, get_provider, resolve_provider
+from ..config import ProviderConfig
 from ..usage import log_usage
 from ..cache import response_cache
 from ..circuit_breaker import breaker
-from ..services import (
-    ClaudeService,
-    ChatGPTService,
-    GeminiService,
-    MoonshotService,
-    PerplexityService
-)
+from ..services import get_service
 
-# Debug logging
-import logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/ai", tags=["AI"])
@@ -45,6 +37,10 @@ FALLBACK_CHAINS = {
 PROVIDER_DEADLINE_S = float(os.getenv("AI_PROVIDER_DEADLINE_S", "15"))
 TOTAL_BUDGET_S      = float(os.getenv("AI_TOTAL_BUDGET_S", "28"))
 
+# Cap concurrent outbound calls per /batch-chat request — without it a caller
+# can open one TLS session per listed provider in a single request.
+_BATCH_SEM = asyncio.Semaphore(int(os.getenv("AI_BATCH_CONCURRENCY", "8")))
+
 # Patterns that indicate a permanent provider failure — no retry, no point trying
 # this provider again, immediately fall over to the next one.
 _PERMANENT_PATTERNS = re.compile(
@@ -104,19 +100,54 @@ class BatchChatRequest(BaseModel):
 
 
 class ChatResponse(BaseModel):
+    # extra="ignore" drops extra fields from AI services; frozen skips
+    # assignment validators and makes instances hashable.
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     content: str
     model: str
     provider: str
     usage: Dict[str, int]
     citations: Optional[List[str]] = None  # Perplexity citations
 
-    class Config:
-        extra = "ignore"  # Ignore extra fields from AI services
 
+# Service classes are resolved lazily so importing this router doesn't pull
+# in every provider SDK (openai, google-genai, ...) at startup. First use
+# pays the import; afterwards it's a dict hit.
+_SERVICE_CLASS_NAMES = {
+    "claude-sonnet": "ClaudeService",
+    "claude-haiku": "ClaudeService",
+    "chatgpt": "ChatGPTService",
+    "openai": "ChatGPTService",  # legacy alias
+    "gemini-pro": "GeminiService",
+    "gemini-flash": "GeminiService",
+    "moonshot": "MoonshotService",
+    "perplexity": "PerplexityService",
+}
+_SERVICE_CLASSES: Dict[str, type] = {}
 
-def get_ai_service(provider_id: str):
-    """Factory function to get the appropriate AI service"""
-    provider = get_provider(provider_id)
+
+def _get_service_class(provider_id: str) -> Optional[type]:
+    """Resolve (and cache) the service class for a provider id"""
+    service_class = _SERVICE_CLASSES.get(provider_id)
+    if service_class is None:
+        class_name = _SERVICE_CLASS_NAMES.get(provider_id)
+        if class_name is None:
+            return None
+        from .. import services
+        service_class = getattr(services, class_name)
+        _SERVICE_CLASSES[provider_id] = service_class
+    return service_class
+
+
+def get_ai_service(provider_id: str, provider: Optional[ProviderConfig] = None):
+    """Factory function to get the appropriate AI service.
+
+    Pass `provider` when the caller already resolved the config to avoid a
+    second lookup.
+    """
+    if provider is None:
+        provider = get_provider(provider_id)
 
     if not provider:
         raise HTTPException(status_code=404, detail=f"Provider not found: {provider_id}")
@@ -127,26 +158,11 @@ def get_ai_service(provider_id: str):
     if not provider.api_key:
         raise HTTPException(status_code=400, detail=f"API key not configured for: {provider_id}")
 
-    service_map = {
-        "claude-sonnet": ClaudeService,
-        "claude-haiku": ClaudeService,
-        "chatgpt": ChatGPTService,
-        "openai": ChatGPTService,  # legacy alias
-        "gemini-pro": GeminiService,
-        "gemini-flash": GeminiService,
-        "moonshot": MoonshotService,
-        "perplexity": PerplexityService
-    }
-
-    service_class = service_map.get(provider_id)
+    service_class = _get_service_class(provider_id)
     if not service_class:
         raise HTTPException(status_code=400, detail=f"Unknown provider: {provider_id}")
 
-    return service_class(
-        api_key=provider.api_key,
-        model=provider.model,
-        base_url=provider.base_url
-    )
+    return get_service(provider_id, provider, service_class)
 
 
 async def _try_provider(
@@ -198,21 +214,40 @@ async def chat(request: ChatRequest):
     Send a chat request to an AI provider.
     Supports caching, fallback chain, and usage logging.
     """
-    config = load_config()
-    provider_id = request.provider or config.default_provider
+    provider_id, provider_cfg = resolve_provider(request.provider)
+    # Model rides in the cache key so a model change in settings doesn't
+    # serve completions generated by the old one.
+    provider_model = provider_cfg.model if provider_cfg else ""
 
-    logger.info(f"[CHAT] Provider: {provider_id}, Messages: {len(request.messages)}")
+    logger.debug("[CHAT] Provider: %s, Messages: %d", provider_id, len(request.messages))
 
     # Check cache (skip for vision requests - images are too large to cache)
     has_images = _has_image_content(request.messages)
     if request.use_cache and not has_images:
         cached = response_cache.get(
-            provider_id, request.messages, request.system_prompt,
+            provider_id, provider_model, request.messages, request.system_prompt,
             request.max_tokens, request.temperature
         )
         if cached:
             cached["_cached"] = True
-            return ChatResponse(**cached)
+            # Result came from our own cache — skip re-validation
+            return ChatResponse.model_construct(**cached)
+
+    # Coalesce concurrent identical requests: a burst of duplicates (retries,
+    # several users asking the same thing) all miss the cache because none
+    # has finished yet — only the first should hit the provider.
+    coalesce_key = None
+    if request.use_cache and not has_images:
+        coalesce_key, inflight = response_cache.begin_inflight(
+            provider_id, provider_model, request.messages, request.system_prompt,
+            request.max_tokens, request.temperature
+        )
+        if inflight is not None:
+            logger.debug("[COALESCE] awaiting identical in-flight request")
+            # shield: one joiner disconnecting must not cancel the shared
+            # future out from under the owner and the other joiners
+            result = await asyncio.shield(inflight)
+            return ChatResponse.model_construct(**result)
 
     # Build provider attempt list (primary + fallbacks)
     providers_to_try = [provider_id]
@@ -220,95 +255,119 @@ async def chat(request: ChatRequest):
         fallbacks = FALLBACK_CHAINS.get(provider_id, [])
         providers_to_try.extend(fallbacks)
 
-    attempts: List[Dict[str, Any]] = []
-    chain_start = time.time()
-    for pid in providers_to_try:
-        remaining = TOTAL_BUDGET_S - (time.time() - chain_start)
-        if remaining <= 1.0:
-            attempts.append({
-                "provider": pid, "status": "skipped",
-                "reason": "total_budget_exhausted", "elapsed_ms": 0,
-            })
-            logger.warning(f"[FALLBACK] budget exhausted before trying {pid}")
-            break
-
-        # Skip providers the breaker has marked as known-broken — avoids
-        # burning the time budget on a provider we already know will fail.
-        # Primary provider is exempt (user explicitly asked for it).
-        if pid != provider_id and breaker.is_open(pid):
-            attempts.append({
-                "provider": pid, "status": "skipped",
-                "reason": "circuit_breaker_open", "elapsed_ms": 0,
-            })
-            logger.info(f"[BREAKER] skipping {pid} (open)")
-            continue
-
-        attempt_deadline = min(PROVIDER_DEADLINE_S, remaining)
-        attempt_start = time.time()
-        try:
-            result = await _try_provider(pid, request, attempt_deadline)
-            breaker.record_success(pid)
-
-            if request.use_cache and not has_images:
-                response_cache.set(
-                    provider_id, request.messages, request.system_prompt,
-                    request.max_tokens, request.temperature, result
-                )
-
-            if pid != provider_id:
-                logger.info(f"[FALLBACK] {provider_id} failed, succeeded with {pid}")
-
-            return ChatResponse(**result)
+    async def _run_providers() -> Dict[str, Any]:
+        attempts: List[Dict[str, Any]] = []
+        chain_start = time.time()
+        for pid in providers_to_try:
+            remaining = TOTAL_BUDGET_S - (time.time() - chain_start)
+            if remaining <= 1.0:
+                attempts.append({
+                    "provider": pid, "status": "skipped",
+                    "reason": "total_budget_exhausted", "elapsed_ms": 0,
+                })
+                logger.warning(f"[FALLBACK] budget exhausted before trying {pid}")
+                break
+
+            # Skip providers the breaker has marked as known-broken — avoids
+            # burning the time budget on a provider we already know will fail.
+            # Primary provider is exempt (user explicitly asked for it).
+            if pid != provider_id and breaker.is_open(pid):
+                attempts.append({
+                    "provider": pid, "status": "skipped",
+                    "reason": "circuit_breaker_open", "elapsed_ms": 0,
+                })
+                logger.info(f"[BREAKER] skipping {pid} (open)")
+                continue
+
+            attempt_deadline = min(PROVIDER_DEADLINE_S, remaining)
+            attempt_start = time.time()
+            try:
+                result = await _try_provider(pid, request, attempt_deadline)
+                breaker.record_success(pid)
+
+                if request.use_cache and not has_images:
+                    response_cache.set(
+                        provider_id, provider_model, request.messages, request.system_prompt,
+                        request.max_tokens, request.temperature, result
+                    )
+
+                if pid != provider_id:
+                    logger.info(f"[FALLBACK] {provider_id} failed, succeeded with {pid}")
+
+                return result
+
+            except HTTPException as e:
+                kind = _classify_error(e)
+                reason = str(e.detail)[:200]
+                breaker.record_failure(pid, kind, reason)
+                attempts.append({
+                    "provider": pid, "status": kind, "reason": reason,
+                    "elapsed_ms": int((time.time() - attempt_start) * 1000),
+                })
+                if not request.use_fallback:
+                    raise
+                logger.warning(f"[FALLBACK] {pid} {kind} ({e.detail}), trying next...")
+            except asyncio.TimeoutError:
+                breaker.record_failure(pid, "transient", "timeout")
+                attempts.append({
+                    "provider": pid, "status": "timeout",
+                    "reason": f"exceeded {attempt_deadline:.1f}s deadline",
+                    "elapsed_ms": int((time.time() - attempt_start) * 1000),
+                })
+                if not request.use_fallback:
+                    raise HTTPException(
+                        status_code=504,
+                        detail=f"{pid} timed out after {attempt_deadline:.1f}s",
+                    )
+                logger.warning(f"[FALLBACK] {pid} timeout, trying next...")
+            except Exception as e:
+                kind = _classify_error(e)
+                reason = f"{type(e).__name__}: {str(e)[:200]}"
+                breaker.record_failure(pid, kind, reason)
+                attempts.append({
+                    "provider": pid, "status": kind, "reason": reason,
+                    "elapsed_ms": int((time.time() - attempt_start) * 1000),
+                })
+                if not request.use_fallback:
+                    logger.error(f"[CHAT ERROR] {type(e).__name__}: {str(e)}")
+                    raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {str(e)}")
+                logger.warning(f"[FALLBACK] {pid} {kind} ({e}), trying next...")
+
+        # All providers failed. Return structured 503 so client can distinguish
+        # "down" from "slow" — see AI_GATEWAY_ERROR_REPORT.md §4-B-6.
+        last = attempts[-1] if attempts else {"reason": "no providers configured"}
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "all_providers_failed",
+                "tried": attempts,
+                "last_reason": last.get("reason", "unknown"),
+                "total_elapsed_ms": int((time.time() - chain_start) * 1000),
+            },
+        )
 
-        except HTTPException as e:
-            kind = _classify_error(e)
-            reason = str(e.detail)[:200]
-            breaker.record_failure(pid, kind, reason)
-            attempts.append({
-                "provider": pid, "status": kind, "reason": reason,
-                "elapsed_ms": int((time.time() - attempt_start) * 1000),
-            })
-            if not request.use_fallback:
-                raise
-            logger.warning(f"[FALLBACK] {pid} {kind} ({e.detail}), trying next...")
-        except asyncio.TimeoutError:
-            breaker.record_failure(pid, "transient", "timeout")
-            attempts.append({
-                "provider": pid, "status": "timeout",
-                "reason": f"exceeded {attempt_deadline:.1f}s deadline",
-                "elapsed_ms": int((time.time() - attempt_start) * 1000),
-            })
-            if not request.use_fallback:
-                raise HTTPException(
-                    status_code=504,
-                    detail=f"{pid} timed out after {attempt_deadline:.1f}s",
-                )
-            logger.warning(f"[FALLBACK] {pid} timeout, trying next...")
-        except Exception as e:
-            kind = _classify_error(e)
-            reason = f"{type(e).__name__}: {str(e)[:200]}"
-            breaker.record_failure(pid, kind, reason)
-            attempts.append({
-                "provider": pid, "status": kind, "reason": reason,
-                "elapsed_ms": int((time.time() - attempt_start) * 1000),
-            })
-            if not request.use_fallback:
-                logger.error(f"[CHAT ERROR] {type(e).__name__}: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {str(e)}")
-            logger.warning(f"[FALLBACK] {pid} {kind} ({e}), trying next...")
-
-    # All providers failed. Return structured 503 so client can distinguish
-    # "down" from "slow" — see AI_GATEWAY_ERROR_REPORT.md §4-B-6.
-    last = attempts[-1] if attempts else {"reason": "no providers configured"}
-    raise HTTPException(
-        status_code=503,
-        detail={
-            "error": "all_providers_failed",
-            "tried": attempts,
-            "last_reason": last.get("reason", "unknown"),
-            "total_elapsed_ms": int((time.time() - chain_start) * 1000),
-        },
-    )
+    if coalesce_key is None:
+        result = await _run_providers()
+    else:
+        try:
+            result = await _run_providers()
+        except asyncio.CancelledError:
+            # The owner's client disconnected — exactly the retry scenario
+            # coalescing absorbs. Don't propagate the cancellation into the
+            # shared future (it would kill every joiner); hand them a
+            # retriable 503 instead.
+            response_cache.end_inflight(coalesce_key, error=HTTPException(
+                status_code=503,
+                detail={"error": "coalesced_request_cancelled", "retriable": True},
+            ))
+            raise
+        except BaseException as e:
+            response_cache.end_inflight(coalesce_key, error=e)
+            raise
+        response_cache.end_inflight(coalesce_key, result=result)
+
+    # Result came from our own service layer — skip re-validation
+    return ChatResponse.model_construct(**result)
 
 
 @router.post("/chat/stream")
@@ -318,11 +377,10 @@ async def chat_stream(request: ChatRequest):
     Each chunk is sent as: data: {"text": "..."}\n\n
     Final event: data: {"done": true}\n\n
     """
-    config = load_config()
-    provider_id = request.provider or config.default_provider
+    provider_id, provider_cfg = resolve_provider(request.provider)
 
     try:
-        service = get_ai_service(provider_id)
+        service = get_ai_service(provider_id, provider_cfg)
     except HTTPException as e:
         async def error_gen():
             yield f"data: {json.dumps({'error': e.detail})}\n\n"
@@ -444,11 +502,12 @@ async def batch_chat(request: BatchChatRequest):
         start_time = time.time()
         try:
             service = get_ai_service(provider_id)
-            result = await service.chat(
-                messages=[{"role": "user", "content": request.test_message}],
-                max_tokens=request.max_tokens,
-                temperature=request.temperature
-            )
+            async with _BATCH_SEM:
+                result = await service.chat(
+                    messages=[{"role": "user", "content": request.test_message}],
+                    max_tokens=request.max_tokens,
+                    temperature=request.temperature
+                )
             elapsed = time.time() - start_time
             return {
                 "provider": provider_id,
@@ -474,8 +533,10 @@ async def batch_chat(request: BatchChatRequest):
                 "elapsed_ms": int(elapsed * 1000)
             }
 
-    # Execute all provider tests concurrently
-    tasks = [test_provider(p) for p in request.providers]
-    results = await asyncio.gather(*tasks)
+    # Execute all provider tests concurrently (bounded by _BATCH_SEM).
+    # test_provider catches its own exceptions, so the TaskGroup never
+    # cancels siblings — it just gives us structured task lifetimes.
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(test_provider(p)) for p in request.providers]
 
-    return {"results": results}
+    return {"results": [t.result() for t in tasks]}
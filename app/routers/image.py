@@ -9,7 +9,7 @@ from pydantic import BaseModel
 
 from ..config import load_config, get_provider
 from ..usage import log_usage
-from ..services import DallEService, ImagenService
+from ..services import DallEService, ImagenService, get_service
 
 logger = logging.getLogger(__name__)
 
@@ -21,17 +21,9 @@ _DEFAULT_IMAGE_ENV = os.getenv("DEFAULT_IMAGE_PROVIDER", "dall-e")
 
 def _get_default_image_provider() -> str:
     """Get default image provider from DB settings, fallback to env var."""
-    from ..config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
+    from ..config import read_setting
     try:
-        if USE_POSTGRES:
-            conn = _get_pg_connection()
-        else:
-            conn = _get_sqlite_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key = 'default_image_provider'")
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else _DEFAULT_IMAGE_ENV
+        return read_setting("default_image_provider") or _DEFAULT_IMAGE_ENV
     except Exception:
         return _DEFAULT_IMAGE_ENV
 
@@ -73,11 +65,7 @@ def _get_image_service(provider_id: str):
     if not service_class:
         raise HTTPException(status_code=400, detail=f"Unknown image provider: {provider_id}")
 
-    return service_class(
-        api_key=provider.api_key,
-        model=provider.model,
-        base_url=provider.base_url
-    )
+    return get_service(provider_id, provider, service_class)
 
 
 @router.post("/image")
@@ -195,17 +183,9 @@ _DEFAULT_IMAGE_EDIT_ENV = os.getenv("DEFAULT_IMAGE_EDIT_PROVIDER", "imagen")
 
 def _get_default_image_edit_provider() -> str:
     """Get default image edit provider from DB settings."""
-    from ..config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
+    from ..config import read_setting
     try:
-        if USE_POSTGRES:
-            conn = _get_pg_connection()
-        else:
-            conn = _get_sqlite_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key = 'default_image_edit_provider'")
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else _DEFAULT_IMAGE_EDIT_ENV
+        return read_setting("default_image_edit_provider") or _DEFAULT_IMAGE_EDIT_ENV
     except Exception:
         return _DEFAULT_IMAGE_EDIT_ENV
 
@@ -1,4 +1,7 @@
+import orjson
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional
 
@@ -24,9 +27,8 @@ async def get_all_providers():
     """Get all provider configurations (API keys masked)"""
     config = load_config()
 
-    providers = {}
-    for provider_id, provider in config.providers.items():
-        providers[provider_id] = {
+    providers = {
+        provider_id: {
             "name": provider.name,
             "api_key": mask_api_key(provider.api_key),
             "model": provider.model,
@@ -34,6 +36,8 @@ async def get_all_providers():
             "enabled": provider.enabled,
             "service_type": provider.service_type
         }
+        for provider_id, provider in config.providers.items()
+    }
 
     return {
         "providers": providers,
@@ -46,10 +50,10 @@ async def get_provider(provider_id: str):
     """Get a specific provider configuration"""
     config = load_config()
 
-    if provider_id not in config.providers:
+    provider = config.providers.get(provider_id)
+    if provider is None:
         raise HTTPException(status_code=404, detail=f"Provider not found: {provider_id}")
 
-    provider = config.providers[provider_id]
     return {
         "id": provider_id,
         "name": provider.name,
@@ -78,6 +82,27 @@ async def update_provider_config(provider_id: str, request: ProviderUpdateReques
         if not updates:
             raise HTTPException(status_code=400, detail="No updates provided")
 
+        # Drop fields that already hold the requested value; UI "save"
+        # buttons routinely resubmit unchanged settings and a no-op PUT
+        # shouldn't rewrite the whole config.
+        current = load_config().providers.get(provider_id)
+        if current is None:
+            raise HTTPException(status_code=404, detail=f"Provider not found: {provider_id}")
+        updates = {k: v for k, v in updates.items() if getattr(current, k) != v}
+
+        if not updates:
+            return {
+                "success": True,
+                "unchanged": True,
+                "provider": {
+                    "id": provider_id,
+                    "name": current.name,
+                    "api_key": mask_api_key(current.api_key),
+                    "model": current.model,
+                    "enabled": current.enabled
+                }
+            }
+
         updated = update_provider(provider_id, updates)
 
         return {
@@ -91,6 +116,8 @@ async def update_provider_config(provider_id: str, request: ProviderUpdateReques
             }
         }
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
@@ -102,7 +129,7 @@ async def set_default_provider(request: DefaultProviderRequest):
     """Set the default AI provider"""
     config = load_config()
 
-    if request.provider not in config.providers:
+    if config.providers.get(request.provider) is None:
         raise HTTPException(status_code=404, detail=f"Provider not found: {request.provider}")
 
     config.default_provider = request.provider
@@ -116,29 +143,16 @@ async def set_default_stt_provider(request: DefaultProviderRequest):
     """Set the default STT provider"""
     config = load_config()
 
-    if request.provider not in config.providers:
+    provider = config.providers.get(request.provider)
+    if provider is None:
         raise HTTPException(status_code=404, detail=f"Provider not found: {request.provider}")
 
-    if config.providers[request.provider].service_type != "stt":
+    if provider.service_type != "stt":
         raise HTTPException(status_code=400, detail=f"Not an STT provider: {request.provider}")
 
     # Save to settings table
-    from ..config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
-    if USE_POSTGRES:
-        conn = _get_pg_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO settings (key, value) VALUES ('default_stt_provider', %s)
-            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
-        ''', (request.provider,))
-    else:
-        conn = _get_sqlite_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO settings (key, value) VALUES ('default_stt_provider', ?)
-        ''', (request.provider,))
-    conn.commit()
-    conn.close()
+    from ..config import write_setting
+    write_setting("default_stt_provider", request.provider)
 
     return {"success": True, "default_stt_provider": request.provider}
 
@@ -147,17 +161,9 @@ async def set_default_stt_provider(request: DefaultProviderRequest):
 async def get_default_stt_provider():
     """Get the default STT provider"""
     import os
-    from ..config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
+    from ..config import read_setting
     try:
-        if USE_POSTGRES:
-            conn = _get_pg_connection()
-        else:
-            conn = _get_sqlite_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key = 'default_stt_provider'")
-        result = cursor.fetchone()
-        conn.close()
-        default = result[0] if result else os.getenv("DEFAULT_STT_PROVIDER", "whisper")
+        default = read_setting("default_stt_provider") or os.getenv("DEFAULT_STT_PROVIDER", "whisper")
     except Exception:
         default = os.getenv("DEFAULT_STT_PROVIDER", "whisper")
     return {"default_stt_provider": default}
@@ -168,28 +174,15 @@ async def set_default_image_provider(request: DefaultProviderRequest):
     """Set the default Image generation provider"""
     config = load_config()
 
-    if request.provider not in config.providers:
+    provider = config.providers.get(request.provider)
+    if provider is None:
         raise HTTPException(status_code=404, detail=f"Provider not found: {request.provider}")
 
-    if config.providers[request.provider].service_type != "image":
+    if provider.service_type != "image":
         raise HTTPException(status_code=400, detail=f"Not an Image provider: {request.provider}")
 
-    from ..config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
-    if USE_POSTGRES:
-        conn = _get_pg_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO settings (key, value) VALUES ('default_image_provider', %s)
-            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
-        ''', (request.provider,))
-    else:
-        conn = _get_sqlite_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO settings (key, value) VALUES ('default_image_provider', ?)
-        ''', (request.provider,))
-    conn.commit()
-    conn.close()
+    from ..config import write_setting
+    write_setting("default_image_provider", request.provider)
 
     return {"success": True, "default_image_provider": request.provider}
 
@@ -198,17 +191,9 @@ async def set_default_image_provider(request: DefaultProviderRequest):
 async def get_default_image_provider():
     """Get the default Image generation provider"""
     import os
-    from ..config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
+    from ..config import read_setting
     try:
-        if USE_POSTGRES:
-            conn = _get_pg_connection()
-        else:
-            conn = _get_sqlite_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key = 'default_image_provider'")
-        result = cursor.fetchone()
-        conn.close()
-        default = result[0] if result else os.getenv("DEFAULT_IMAGE_PROVIDER", "dall-e")
+        default = read_setting("default_image_provider") or os.getenv("DEFAULT_IMAGE_PROVIDER", "dall-e")
     except Exception:
         default = os.getenv("DEFAULT_IMAGE_PROVIDER", "dall-e")
     return {"default_image_provider": default}
@@ -220,33 +205,31 @@ async def set_default_image_edit_provider(request: DefaultProviderRequest):
     if request.provider not in ("imagen", "dall-e"):
         raise HTTPException(status_code=400, detail=f"Invalid image edit provider: {request.provider}. Use 'imagen' or 'dall-e'.")
 
-    from ..config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
-    if USE_POSTGRES:
-        conn = _get_pg_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO settings (key, value) VALUES ('default_image_edit_provider', %s)
-            ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
-        ''', (request.provider,))
-    else:
-        conn = _get_sqlite_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO settings (key, value) VALUES ('default_image_edit_provider', ?)
-        ''', (request.provider,))
-    conn.commit()
-    conn.close()
+    from ..config import write_setting
+    write_setting("default_image_edit_provider", request.provider)
 
     return {"success": True, "default_image_edit_provider": request.provider}
 
 
+# Preallocated star padding: slicing a constant is a memcpy, cheaper than
+# either "*" * n or an lru_cache lookup per provider per request.
+_STARS = "*" * 1024
+
+
+def _stars(n: int) -> str:
+    """Star padding of length n, sliced from a preallocated buffer"""
+    if n <= len(_STARS):
+        return _STARS[:n]
+    return "*" * n
+
+
 def mask_api_key(api_key: str) -> str:
     """Mask API key for display (show first 8 and last 4 characters)"""
     if not api_key:
         return ""
     if len(api_key) <= 12:
-        return "*" * len(api_key)
-    return api_key[:8] + "*" * (len(api_key) - 12) + api_key[-4:]
+        return _stars(len(api_key))
+    return api_key[:8] + _stars(len(api_key) - 12) + api_key[-4:]
 
 
 @router.post("/reset")
@@ -264,10 +247,17 @@ async def reset_all_providers():
 async def export_config():
     """Export all provider configurations as JSON (includes API keys)"""
     config = load_config()
-    return {
-        "providers": {k: v.model_dump() for k, v in config.providers.items()},
-        "default_provider": config.default_provider
-    }
+    # Hand the ProviderConfig objects straight to orjson with a model_dump
+    # fallback: one serialize pass, no intermediate dict-of-dicts (and no
+    # FastAPI jsonable_encoder walk over the result).
+    payload = orjson.dumps(
+        {
+            "providers": config.providers,
+            "default_provider": config.default_provider
+        },
+        default=lambda o: o.model_dump()
+    )
+    return Response(content=payload, media_type="application/json")
 
 
 @router.post("/import")
@@ -9,7 +9,7 @@ from pydantic import BaseModel
 
 from ..config import load_config, get_provider
 from ..usage import log_usage
-from ..services import WhisperService, ClovaSttService, ClovaCsrService
+from ..services import WhisperService, ClovaSttService, ClovaCsrService, get_service
 
 logger = logging.getLogger(__name__)
 
@@ -29,17 +29,9 @@ _DEFAULT_STT_ENV = os.getenv("DEFAULT_STT_PROVIDER", "whisper")
 
 def _get_default_stt_provider() -> str:
     """Get default STT provider from DB settings, fallback to env var."""
-    from ..config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
+    from ..config import read_setting
     try:
-        if USE_POSTGRES:
-            conn = _get_pg_connection()
-        else:
-            conn = _get_sqlite_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key = 'default_stt_provider'")
-        result = cursor.fetchone()
-        conn.close()
-        return result[0] if result else _DEFAULT_STT_ENV
+        return read_setting("default_stt_provider") or _DEFAULT_STT_ENV
     except Exception:
         return _DEFAULT_STT_ENV
 
@@ -75,11 +67,7 @@ def _get_stt_service(provider_id: str):
     if not service_class:
         raise HTTPException(status_code=400, detail=f"Unknown STT provider: {provider_id}")
 
-    return service_class(
-        api_key=provider.api_key,
-        model=provider.model,
-        base_url=provider.base_url
-    )
+    return get_service(provider_id, provider, service_class)
 
 
 def _get_file_extension(filename: str) -> str:
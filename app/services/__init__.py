@@ -1,31 +1,132 @@
-from .base import AIService
-from .claude import ClaudeService
-from .chatgpt import ChatGPTService
-from .gemini import GeminiService
-from .moonshot import MoonshotService
-from .perplexity import PerplexityService
-from .stt_base import STTService
-from .whisper import WhisperService
-from .clova_csr import ClovaCsrService
-from .clova_stt import ClovaSttService
-from .image_base import ImageService
-from .dall_e import DallEService
-from .imagen import ImagenService
-from .image_edit import ImageEditService
-
-__all__ = [
-    "AIService",
-    "ClaudeService",
-    "ChatGPTService",
-    "GeminiService",
-    "MoonshotService",
-    "PerplexityService",
-    "STTService",
-    "WhisperService",
-    "ClovaCsrService",
-    "ClovaSttService",
-    "ImageService",
-    "DallEService",
-    "ImagenService",
-    "ImageEditService",
-]
+"""AI service classes, exported lazily (PEP 562).
+
+Importing a service class here used to drag in every provider SDK (openai,
+google-genai, ...) at startup even for deployments that only use one
+provider. Each class is now imported from its module on first attribute
+access and cached in module globals, so the second lookup is a plain dict
+hit.
+
+Also hosts the shared service-instance cache: building a service per
+request throws away SDK clients and their connection pools, so instances
+are cached by provider config and invalidated on config writes.
+"""
+import asyncio
+import hashlib
+import importlib
+import logging
+import os
+
+from ..config import on_config_change
+
+logger = logging.getLogger(__name__)
+
+_SERVICE_MODULES = {
+    "AIService": ".base",
+    "ClaudeService": ".claude",
+    "ChatGPTService": ".chatgpt",
+    "GeminiService": ".gemini",
+    "MoonshotService": ".moonshot",
+    "PerplexityService": ".perplexity",
+    "STTService": ".stt_base",
+    "WhisperService": ".whisper",
+    "ClovaCsrService": ".clova_csr",
+    "ClovaSttService": ".clova_stt",
+    "ImageService": ".image_base",
+    "DallEService": ".dall_e",
+    "ImagenService": ".imagen",
+    "ImageEditService": ".image_edit",
+}
+
+__all__ = list(_SERVICE_MODULES)
+
+
+def __getattr__(name):
+    module_name = _SERVICE_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    attr = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = attr  # self-replace: next access skips this hook
+    return attr
+
+
+# Cached service instances keyed by provider config. The API key is hashed
+# so the cache keys don't hold extra plaintext copies of secrets.
+_SERVICE_CACHE = {}
+
+
+def _cache_key(provider_id, provider):
+    key_hash = hashlib.blake2b(provider.api_key.encode(), digest_size=8).digest()
+    return (provider_id, provider.model, provider.base_url, key_hash)
+
+
+def get_service(provider_id, provider, service_class):
+    """Get (or build and cache) a service instance for a provider config"""
+    key = _cache_key(provider_id, provider)
+    service = _SERVICE_CACHE.get(key)
+    if service is None:
+        service = service_class(
+            api_key=provider.api_key,
+            model=provider.model,
+            base_url=provider.base_url,
+        )
+        _SERVICE_CACHE[key] = service
+    return service
+
+
+# Stale instances linger for a grace period before their pools close:
+# closing immediately aborts concurrent requests still awaiting on the old
+# clients ("client has been closed"). The grace just needs to outlast the
+# longest legitimate call (streams and STT uploads run well past the chat
+# budget); the only cost of a generous value is a briefly idle pool.
+_CLOSE_GRACE_SECS = float(os.getenv("SERVICE_CLOSE_GRACE_S", "300"))
+# task -> service awaiting its grace close; holds strong refs to the tasks
+# (create_task results are otherwise GC-able) and lets shutdown close the
+# services directly instead of waiting out the grace.
+_PENDING_CLOSE = {}
+
+
+async def _close_after_grace(service):
+    await asyncio.sleep(_CLOSE_GRACE_SECS)
+    try:
+        await service.aclose()
+    except Exception as e:
+        logger.warning("[SERVICES] failed to close stale service client: %s", e)
+
+
+def invalidate_services() -> None:
+    """Drop cached instances; pools close after in-flight calls drain"""
+    stale = list(_SERVICE_CACHE.values())
+    _SERVICE_CACHE.clear()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # no loop yet — nothing has opened a connection
+    for service in stale:
+        if hasattr(service, "aclose"):
+            task = loop.create_task(_close_after_grace(service))
+            _PENDING_CLOSE[task] = service
+            task.add_done_callback(_PENDING_CLOSE.pop)
+
+
+async def aclose_services() -> None:
+    """Close pooled clients of all cached services (app shutdown)"""
+    # Flush pending grace-period closes — the loop is going away.
+    pending = list(_PENDING_CLOSE.items())
+    for task, _ in pending:
+        task.cancel()
+    stale = [service for _, service in pending]
+
+    stale += list(_SERVICE_CACHE.values())
+    _SERVICE_CACHE.clear()
+    for service in stale:
+        if not hasattr(service, "aclose"):
+            continue
+        try:
+            await service.aclose()
+        except Exception as e:
+            logger.warning("[SHUTDOWN] failed to close service client: %s", e)
+    from .http import aclose_shared_client
+    await aclose_shared_client()
+
+
+on_config_change(invalidate_services)
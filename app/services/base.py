@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, AsyncGenerator
+from typing import List, Dict, Any, Optional, AsyncGenerator, Union
 
 
 class AIService(ABC):
@@ -46,3 +47,31 @@ class AIService(ABC):
         """
         result = await self.chat(messages, system_prompt, max_tokens, temperature)
         yield result["content"]
+
+    async def chat_many(
+        self,
+        batches: List[Dict[str, Any]],
+        max_inflight: int = 10
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Run many chat requests concurrently with bounded parallelism.
+
+        Args:
+            batches: List of kwargs dicts for chat() (messages, system_prompt, ...)
+            max_inflight: Maximum concurrent requests — keep below the
+                provider's rate limit
+
+        Returns:
+            Results in input order; a failed request yields its exception
+            instead of aborting the whole batch.
+        """
+        sem = asyncio.Semaphore(max_inflight)
+
+        async def _one(batch: Dict[str, Any]):
+            async with sem:
+                return await self.chat(**batch)
+
+        return await asyncio.gather(*(_one(b) for b in batches), return_exceptions=True)
+
+    async def aclose(self) -> None:
+        """Release pooled network resources. Default: nothing to close."""
@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 import httpx
 import logging
 from typing import List, Dict, Any, Optional, AsyncGenerator
@@ -10,6 +10,22 @@ logger = logging.getLogger(__name__)
 class ChatGPTService(AIService):
     """ChatGPT (OpenAI) AI Service"""
 
+    def __init__(self, api_key: str, model: str, base_url: str = None):
+        super().__init__(api_key, model, base_url)
+        # One SDK client per instance so its internal httpx pool and TLS
+        # session are reused across requests (instances are cached by the
+        # router). Extended 5 min timeout for long analysis requests;
+        # max_retries=0 because the gateway handles fallback itself.
+        self._client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            timeout=httpx.Timeout(300.0, connect=60.0),
+            max_retries=0,
+        )
+
+    async def aclose(self) -> None:
+        await self._client.close()
+
     def _transform_messages_for_openai(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform Claude-format image blocks to OpenAI format."""
         transformed = []
@@ -40,32 +56,27 @@ class ChatGPTService(AIService):
         max_tokens: int = 4096,
         temperature: float = 0.7
     ) -> Dict[str, Any]:
-        logger.info(f"[OPENAI] Model: {self.model}, Max tokens: {max_tokens}")
-        logger.info(f"[OPENAI] Messages: {len(messages)}, System prompt: {len(system_prompt) if system_prompt else 0} chars")
+        # %-style args: formatting is skipped entirely when INFO is disabled
+        logger.info("[OPENAI] Model: %s, Max tokens: %d", self.model, max_tokens)
+        logger.info("[OPENAI] Messages: %d, System prompt: %d chars",
+                    len(messages), len(system_prompt) if system_prompt else 0)
 
         try:
-            # Use configured OpenAI endpoint with extended timeout
-            client = OpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url,
-                timeout=httpx.Timeout(300.0, connect=60.0),  # 5 min timeout
-                max_retries=0,  # gateway handles fallback; SDK retries on permanent errors waste time
-            )
-
             # Transform image blocks to OpenAI format
             messages = self._transform_messages_for_openai(messages)
 
-            # Prepend system message if provided
-            all_messages = []
+            # Prepend system message if provided — one allocation sized to
+            # the final length instead of append+extend growth
             if system_prompt:
-                all_messages.append({"role": "system", "content": system_prompt})
-            all_messages.extend(messages)
+                all_messages = [{"role": "system", "content": system_prompt}, *messages]
+            else:
+                all_messages = messages
 
-            logger.info(f"[OPENAI] Calling API...")
+            logger.info("[OPENAI] Calling API...")
 
             # Call OpenAI API using SDK
             # GPT-5.1 and newer models require max_completion_tokens instead of max_tokens
-            response = client.chat.completions.create(
+            response = await self._client.chat.completions.create(
                 model=self.model,
                 messages=all_messages,
                 temperature=temperature,
@@ -73,7 +84,7 @@ class ChatGPTService(AIService):
             )
 
             content = response.choices[0].message.content
-            logger.info(f"[OPENAI] Response received, content length: {len(content) if content else 0}")
+            logger.info("[OPENAI] Response received, content length: %d", len(content) if content else 0)
 
             return {
                 "content": content,
@@ -86,7 +97,7 @@ class ChatGPTService(AIService):
             }
 
         except Exception as e:
-            logger.error(f"[OPENAI ERROR] {type(e).__name__}: {str(e)}")
+            logger.error("[OPENAI ERROR] %s: %s", type(e).__name__, e)
             raise
 
     async def stream(
@@ -96,21 +107,14 @@ class ChatGPTService(AIService):
         max_tokens: int = 4096,
         temperature: float = 0.7
     ) -> AsyncGenerator[str, None]:
-        client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-            timeout=httpx.Timeout(300.0, connect=60.0),
-            max_retries=0,
-        )
-
         messages = self._transform_messages_for_openai(messages)
 
-        all_messages = []
         if system_prompt:
-            all_messages.append({"role": "system", "content": system_prompt})
-        all_messages.extend(messages)
+            all_messages = [{"role": "system", "content": system_prompt}, *messages]
+        else:
+            all_messages = messages
 
-        stream = client.chat.completions.create(
+        stream = await self._client.chat.completions.create(
             model=self.model,
             messages=all_messages,
             temperature=temperature,
@@ -118,6 +122,6 @@ class ChatGPTService(AIService):
             stream=True
         )
 
-        for chunk in stream:
+        async for chunk in stream:
             if chunk.choices and chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
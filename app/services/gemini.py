@@ -1,103 +1,325 @@
 from google import genai
 from google.genai import types
 import base64
+import functools
+import hashlib
 import logging
+import os
+import time
 from typing import List, Dict, Any, Optional
 from .base import AIService
 
 logger = logging.getLogger(__name__)
 
+# Server-side prompt caching: transcripts are resent whole on every call,
+# so Gemini re-encodes the same prefix tokens each time. Prefixes above
+# this size get uploaded once as CachedContent and referenced by handle.
+# The threshold is a character count; at ~4 chars/token the default keeps
+# us above the models' minimum cacheable token counts (4096 tokens on the
+# Pro models), where shorter prefixes are rejected with INVALID_ARGUMENT.
+_PROMPT_CACHE_MIN_CHARS = int(os.getenv("GEMINI_PROMPT_CACHE_MIN_CHARS", "32768"))
+_PROMPT_CACHE_TTL_SECS = 600
+_PROMPT_CACHE_MAX_ENTRIES = 16
+
+# Error substrings that mean the model/endpoint doesn't support caching at
+# all (vs. a transient failure worth retrying on a later call).
+_PROMPT_CACHE_UNSUPPORTED_TAGS = (
+    "INVALID_ARGUMENT", "PERMISSION_DENIED", "NOT_FOUND", "FAILED_PRECONDITION"
+)
+
+# Safety settings never change per request — build the SafetySetting objects
+# once at import instead of on every chat() call.
+_SAFETY_SETTINGS = [
+    types.SafetySetting(category=category, threshold="OFF")
+    for category in (
+        "HARM_CATEGORY_HARASSMENT",
+        "HARM_CATEGORY_HATE_SPEECH",
+        "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "HARM_CATEGORY_DANGEROUS_CONTENT",
+    )
+]
+
+
+# One genai.Client per API key: gemini-pro and gemini-flash usually share
+# a key, and each Client carries its own HTTP connection pool.
+_CLIENTS: Dict[str, genai.Client] = {}
+
+
+def _get_client(api_key: str) -> genai.Client:
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        client = genai.Client(api_key=api_key)
+        _CLIENTS[api_key] = client
+    return client
+
+
+@functools.lru_cache(maxsize=32)
+def _generation_config(temperature: float, max_tokens: int) -> types.GenerateContentConfig:
+    """Memoized config — (temperature, max_tokens) pairs repeat constantly"""
+    return types.GenerateContentConfig(
+        temperature=temperature,
+        max_output_tokens=max_tokens,
+        safety_settings=_SAFETY_SETTINGS,
+    )
+
+
+def _extract_text(response) -> tuple:
+    """Pull (content_text, finish_reason) out of a generate_content response.
+
+    Single pass with early return: the accessor `response.text` already walks
+    the candidate parts internally, so on the common path we touch it once and
+    stop. The manual parts walk only runs when the accessor fails (e.g. mixed
+    part types), and the expensive model_dump diagnostic only under DEBUG.
+    """
+    candidates = response.candidates
+    finish_reason = "UNKNOWN"
+    if candidates:
+        fr = candidates[0].finish_reason
+        if fr:
+            finish_reason = str(fr)
+
+    try:
+        text = response.text
+        if text:
+            return text, finish_reason
+    except Exception as e:
+        logger.warning("[GEMINI] response.text accessor failed: %s", e)
+
+    # Fallback: walk candidate parts manually
+    if candidates:
+        candidate = candidates[0]
+        content = getattr(candidate, 'content', None)
+        parts = getattr(content, 'parts', None) if content else None
+        if parts:
+            parts_text = [part.text for part in parts if getattr(part, 'text', None)]
+            if parts_text:
+                return "\n".join(parts_text), finish_reason
+
+    # Diagnostic only, and a full model_dump walk is expensive — gate behind DEBUG
+    if logger.isEnabledFor(logging.DEBUG):
+        try:
+            if hasattr(response, 'model_dump'):
+                logger.debug("[GEMINI] Response dict: %s", str(response.model_dump())[:1000])
+            elif hasattr(response, '__dict__'):
+                logger.debug("[GEMINI] Response __dict__: %s", str(response.__dict__)[:1000])
+        except Exception as e:
+            logger.warning("[GEMINI] Could not serialize response: %s", e)
+
+    return None, finish_reason
+
 
 class GeminiService(AIService):
     """Gemini (Google) AI Service - Using new google-genai SDK"""
 
     def __init__(self, api_key: str, model: str, base_url: str = None):
         super().__init__(api_key, model, base_url)
-        self.client = genai.Client(api_key=self.api_key)
-        logger.info(f"[GEMINI] Initialized with model: {model}")
+        self.client = _get_client(self.api_key)
+        # prefix hash -> (server cache name, local expiry); insertion-ordered
+        # for LRU eviction. Disabled for the instance only when the API says
+        # caching is unsupported (transient errors just skip one call).
+        self._prefix_caches: Dict[str, tuple] = {}
+        # prefix hash -> last-seen time; a server cache is only created for
+        # a prefix we've seen before (see _get_prefix_cache)
+        self._prefix_seen: Dict[str, float] = {}
+        self._prompt_cache_ok = True
+        logger.info("[GEMINI] Initialized with model: %s", model)
 
-    async def chat(
+    def _prefix_cache_key(self, prefix: List[Dict[str, Any]]) -> Optional[str]:
+        """Hash a text-only content prefix (None if it contains images)"""
+        digest = hashlib.sha256(self.model.encode())
+        for content in prefix:
+            digest.update(content["role"].encode())
+            for part in content["parts"]:
+                text = part.get("text")
+                if text is None:
+                    return None
+                digest.update(text.encode())
+        return digest.hexdigest()
+
+    async def _get_prefix_cache(self, contents: List[Dict[str, Any]]) -> Optional[str]:
+        """Get (or create) a server-side cache for the stable prefix.
+
+        The prefix is everything but the newest turn. Returns the cache
+        handle name, or None when caching doesn't apply (short prefix,
+        image parts, first sighting, or the API rejected caching earlier).
+        """
+        if not self._prompt_cache_ok or len(contents) < 2:
+            return None
+        prefix = contents[:-1]
+        total_chars = sum(
+            len(part.get("text", "")) for content in prefix for part in content["parts"]
+        )
+        if total_chars < _PROMPT_CACHE_MIN_CHARS:
+            return None
+        key = self._prefix_cache_key(prefix)
+        if key is None:
+            return None
+
+        now = time.time()
+        entry = self._prefix_caches.get(key)
+        if entry and now < entry[1]:
+            return entry[0]
+
+        # Only upload a prefix we've seen before. In a growing conversation
+        # the prefix changes every turn (it absorbs the last exchange), so a
+        # first sighting would pay a blocking caches.create round-trip for a
+        # handle that's never reused; repeats — retries and regenerations —
+        # are the workload the cache actually serves.
+        seen_at = self._prefix_seen.get(key)
+        self._prefix_seen[key] = now
+        while len(self._prefix_seen) > _PROMPT_CACHE_MAX_ENTRIES * 4:
+            self._prefix_seen.pop(next(iter(self._prefix_seen)))
+        if seen_at is None or now - seen_at > _PROMPT_CACHE_TTL_SECS:
+            return None
+
+        try:
+            cache = await self.client.aio.caches.create(
+                model=self.model,
+                config=types.CreateCachedContentConfig(
+                    contents=prefix,
+                    ttl=f"{_PROMPT_CACHE_TTL_SECS}s",
+                ),
+            )
+        except Exception as e:
+            msg = str(e)
+            if any(tag in msg for tag in _PROMPT_CACHE_UNSUPPORTED_TAGS):
+                logger.info("[GEMINI] Prompt caching unsupported, disabling: %s", e)
+                self._prompt_cache_ok = False
+            else:
+                # Transient (network/5xx) — skip this call, try again later
+                logger.debug("[GEMINI] Prompt cache create failed: %s", e)
+            return None
+
+        # Expire locally 30s before the server TTL so we never reference a
+        # just-deleted cache.
+        self._prefix_caches[key] = (cache.name, now + _PROMPT_CACHE_TTL_SECS - 30)
+        while len(self._prefix_caches) > _PROMPT_CACHE_MAX_ENTRIES:
+            self._prefix_caches.pop(next(iter(self._prefix_caches)))
+        return cache.name
+
+    def _build_contents(
         self,
         messages: List[Dict[str, Any]],
-        system_prompt: Optional[str] = None,
-        max_tokens: int = 4096,
-        temperature: float = 0.7
-    ) -> Dict[str, Any]:
-        logger.info(f"[GEMINI] Model: {self.model}, Max tokens: {max_tokens}")
-        logger.info(f"[GEMINI] Messages: {len(messages)}, System prompt: {len(system_prompt) if system_prompt else 0} chars")
-
-        # Build contents for the API
+        system_prompt: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Convert gateway messages to the contents list for the API"""
         contents = []
 
         # Add system prompt as first user message if provided
+        # Plain dicts throughout: generate_content accepts ContentDict /
+        # PartDict, and skipping the pydantic __init__ per message matters
+        # on multi-hundred-turn transcripts.
         if system_prompt:
-            contents.append(types.Content(
-                role="user",
-                parts=[types.Part(text=f"[System Instruction]\n{system_prompt}\n\n[User Message]")]
-            ))
+            contents.append({
+                "role": "user",
+                "parts": [{"text": f"[System Instruction]\n{system_prompt}\n\n[User Message]"}]
+            })
 
-        for msg in messages:
-            role = "model" if msg.get("role") == "assistant" else "user"
-            content = msg.get("content", "")
+        # Accumulate each role run, then emit one content dict per run. Text
+        # fragments are collected as plain strings and joined once at the
+        # role boundary — appending to the previous content per message made
+        # long transcripts quadratic in copied characters.
+        pending_role = None
+        pending_parts = []  # str for text fragments, dict for image parts
+
+        def _flush():
+            if not pending_parts:
+                return
+            parts = []
+            text_run = []
+            for part in pending_parts:
+                if isinstance(part, str):
+                    text_run.append(part)
+                else:
+                    if text_run:
+                        parts.append({"text": "\n\n".join(text_run)})
+                        text_run = []
+                    parts.append(part)
+            if text_run:
+                parts.append({"text": "\n\n".join(text_run)})
+            contents.append({"role": pending_role, "parts": parts})
 
+        for msg in messages:
+            content = msg.get("content")
             if not content:
                 continue
+            if isinstance(content, str) and content.isspace():
+                continue
+            role = "model" if msg.get("role") == "assistant" else "user"
 
-            # Build parts from content (string or multimodal array)
-            parts = []
+            if role != pending_role:
+                _flush()
+                pending_role = role
+                pending_parts = []
+
+            # Collect parts from content (string or multimodal array)
             if isinstance(content, list):
                 for block in content:
                     if isinstance(block, dict):
                         if block.get("type") == "text":
-                            parts.append(types.Part(text=block.get("text", "")))
+                            pending_parts.append(block.get("text", ""))
                         elif block.get("type") == "image":
                             source = block.get("source", {})
                             media_type = source.get("media_type", "image/jpeg")
                             data_b64 = source.get("data", "")
                             image_bytes = base64.b64decode(data_b64)
-                            parts.append(types.Part(
-                                inline_data=types.Blob(
-                                    mime_type=media_type,
-                                    data=image_bytes
-                                )
-                            ))
+                            pending_parts.append({
+                                "inline_data": {
+                                    "mime_type": media_type,
+                                    "data": image_bytes
+                                }
+                            })
             else:
-                parts.append(types.Part(text=content))
+                pending_parts.append(content)
 
-            if not parts:
-                continue
+        _flush()
+        return contents
 
-            # Merge if same role as previous
-            if contents and contents[-1].role == role:
-                contents[-1].parts.extend(parts)
-            else:
-                contents.append(types.Content(role=role, parts=parts))
-
-        # Generation config
-        generation_config = types.GenerateContentConfig(
-            temperature=temperature,
-            max_output_tokens=max_tokens,
-            safety_settings=[
-                types.SafetySetting(
-                    category="HARM_CATEGORY_HARASSMENT",
-                    threshold="OFF"
-                ),
-                types.SafetySetting(
-                    category="HARM_CATEGORY_HATE_SPEECH",
-                    threshold="OFF"
-                ),
-                types.SafetySetting(
-                    category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    threshold="OFF"
-                ),
-                types.SafetySetting(
-                    category="HARM_CATEGORY_DANGEROUS_CONTENT",
-                    threshold="OFF"
-                ),
-            ]
-        )
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7
+    ) -> Dict[str, Any]:
+        # Routine per-request detail is DEBUG; %-style args skip formatting
+        # entirely when the level is disabled
+        logger.debug("[GEMINI] Model: %s, Max tokens: %d", self.model, max_tokens)
+        logger.debug("[GEMINI] Messages: %d, System prompt: %d chars",
+                     len(messages), len(system_prompt) if system_prompt else 0)
+
+        contents = self._build_contents(messages, system_prompt)
+
+        # Degenerate input — the API would only round-trip to an error, so
+        # answer synthetically without paying the network call.
+        if not contents:
+            logger.warning("[GEMINI] Empty input, skipping API call")
+            return {
+                "content": "[empty input]",
+                "model": self.model,
+                "finish_reason": "EMPTY_INPUT",
+                "usage": {"input_tokens": 0, "output_tokens": 0},
+                "provider": "gemini"
+            }
 
-        logger.info(f"[GEMINI] Calling API...")
+        # Reference a cached prefix where one applies — only the newest turn
+        # is re-encoded server-side.
+        cached_name = await self._get_prefix_cache(contents)
+        if cached_name:
+            contents = contents[-1:]
+
+        # Generation config — memoized for the common uncached shape
+        if cached_name:
+            generation_config = types.GenerateContentConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                safety_settings=_SAFETY_SETTINGS,
+                cached_content=cached_name,
+            )
+        else:
+            generation_config = _generation_config(temperature, max_tokens)
+
+        logger.debug("[GEMINI] Calling API...")
         try:
             response = await self.client.aio.models.generate_content(
                 model=self.model,
@@ -106,77 +328,28 @@ class GeminiService(AIService):
             )
         except Exception as e:
             error_msg = str(e)
-            logger.error(f"[GEMINI ERROR] {type(e).__name__}: {error_msg}")
+            logger.error("[GEMINI ERROR] %s: %s", type(e).__name__, error_msg)
             if "504" in error_msg or "timed out" in error_msg.lower() or "timeout" in error_msg.lower():
                 raise Exception(f"Gemini API timeout: 요청 시간이 초과되었습니다. 녹취록이 너무 길 수 있습니다.")
             raise Exception(f"Gemini API error: {error_msg}")
 
-        # Extract response with detailed logging
-        logger.info(f"[GEMINI] Response type: {type(response)}")
-        logger.info(f"[GEMINI] Response attributes: {dir(response)}")
-
-        content_text = None
-
-        # Method 1: Try response.text directly
-        try:
-            if hasattr(response, 'text') and response.text:
-                content_text = response.text
-                logger.info(f"[GEMINI] Method 1 (response.text) succeeded, length: {len(content_text)}")
-        except Exception as e:
-            logger.warning(f"[GEMINI] Method 1 failed: {str(e)}")
-
-        # Method 2: Try candidates[0].content.parts[0].text
-        if not content_text and response.candidates:
-            candidate = response.candidates[0]
-            logger.info(f"[GEMINI] Candidate type: {type(candidate)}")
-            logger.info(f"[GEMINI] Candidate attributes: {dir(candidate)}")
-
-            if hasattr(candidate, 'content') and candidate.content:
-                logger.info(f"[GEMINI] Content type: {type(candidate.content)}")
-                if hasattr(candidate.content, 'parts') and candidate.content.parts:
-                    logger.info(f"[GEMINI] Parts count: {len(candidate.content.parts)}")
-                    parts_text = []
-                    for i, part in enumerate(candidate.content.parts):
-                        logger.info(f"[GEMINI] Part {i} type: {type(part)}, attrs: {dir(part)}")
-                        if hasattr(part, 'text') and part.text:
-                            parts_text.append(part.text)
-                            logger.info(f"[GEMINI] Part {i} text length: {len(part.text)}")
-                    if parts_text:
-                        content_text = "\n".join(parts_text)
-                        logger.info(f"[GEMINI] Method 2 succeeded, length: {len(content_text)}")
-
-        # Method 3: Try to serialize and check structure
+        content_text, finish_reason = _extract_text(response)
         if not content_text:
-            try:
-                if hasattr(response, 'model_dump'):
-                    response_dict = response.model_dump()
-                    logger.info(f"[GEMINI] Response dict: {str(response_dict)[:1000]}")
-                elif hasattr(response, '__dict__'):
-                    logger.info(f"[GEMINI] Response __dict__: {str(response.__dict__)[:1000]}")
-            except Exception as e:
-                logger.warning(f"[GEMINI] Could not serialize response: {str(e)}")
-
-        # Fallback
-        if not content_text:
-            finish_reason = "UNKNOWN"
-            if response.candidates:
-                fr = getattr(response.candidates[0], 'finish_reason', None)
-                finish_reason = str(fr) if fr else "UNKNOWN"
             content_text = f"[Empty response: {finish_reason}]"
-            logger.warning(f"[GEMINI] All extraction methods failed: {content_text}")
-
-        # Extract metadata
-        input_tokens = 0
-        output_tokens = 0
-        if hasattr(response, 'usage_metadata') and response.usage_metadata:
-            input_tokens = getattr(response.usage_metadata, 'prompt_token_count', 0) or 0
-            output_tokens = getattr(response.usage_metadata, 'candidates_token_count', 0) or 0
+            logger.warning("[GEMINI] All extraction methods failed: %s", content_text)
 
-        finish_reason = "UNKNOWN"
-        if response.candidates:
-            finish_reason = str(response.candidates[0].finish_reason) if hasattr(response.candidates[0], 'finish_reason') else "UNKNOWN"
+        # Extract metadata — single branch on a local instead of repeated
+        # getattr-with-default calls
+        usage = response.usage_metadata
+        if usage:
+            input_tokens = usage.prompt_token_count or 0
+            output_tokens = usage.candidates_token_count or 0
+        else:
+            input_tokens = 0
+            output_tokens = 0
 
-        logger.info(f"[GEMINI] Final response - finish_reason: {finish_reason}, input: {input_tokens}, output: {output_tokens}")
+        logger.debug("[GEMINI] Final response - finish_reason: %s, input: %d, output: %d",
+                     finish_reason, input_tokens, output_tokens)
 
         return {
             "content": content_text,
@@ -188,3 +361,27 @@ class GeminiService(AIService):
             },
             "provider": "gemini"
         }
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7
+    ):
+        """Stream response text chunks as they are generated"""
+        contents = self._build_contents(messages, system_prompt)
+        generation_config = _generation_config(temperature, max_tokens)
+
+        stream = await self.client.aio.models.generate_content_stream(
+            model=self.model,
+            contents=contents,
+            config=generation_config
+        )
+        async for chunk in stream:
+            try:
+                text = chunk.text
+            except Exception:
+                continue
+            if text:
+                yield text
@@ -0,0 +1,72 @@
+"""Shared httpx client for services that speak raw HTTP.
+
+Moonshot/Perplexity opened a throwaway AsyncClient per chat() call, so
+every request paid DNS + TCP + TLS before the first byte. One pooled
+client with keep-alive (and HTTP/2 multiplexing where the optional h2
+package is installed) serves all of them; it is closed alongside the
+cached service instances at app shutdown.
+"""
+import asyncio
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_CLIENT = None
+
+# Connect-level retries on the transport: transient dial/TLS failures to a
+# provider get retried by httpx itself instead of surfacing as chat errors.
+_CONNECT_RETRIES = int(os.getenv("HTTP_CONNECT_RETRIES", "2"))
+
+
+def _build_client(http2: bool) -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(
+        http2=http2,
+        retries=_CONNECT_RETRIES,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=200),
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(120.0, connect=5.0),
+    )
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Get the shared pooled AsyncClient (created on first use)"""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        try:
+            _CLIENT = _build_client(http2=True)
+        except ImportError:
+            # h2 not installed — plain HTTP/1.1 keep-alive still skips
+            # the per-call handshake
+            _CLIENT = _build_client(http2=False)
+    return _CLIENT
+
+
+async def prewarm(base_urls) -> None:
+    """Open keep-alive connections to the given origins at startup.
+
+    The first real request otherwise pays DNS + TCP + TLS (~2-3 RTT).
+    Any response — including 4xx — leaves a warm connection in the pool;
+    failures are logged and swallowed, warming is best-effort.
+    """
+    client = get_shared_client()
+
+    async def _head(url):
+        try:
+            await client.head(url, timeout=5.0)
+        except Exception as e:
+            logger.debug("[PREWARM] %s: %s", url, e)
+
+    await asyncio.gather(*(_head(url) for url in base_urls))
+
+
+async def aclose_shared_client() -> None:
+    """Close the shared client's connection pool (app shutdown)"""
+    global _CLIENT
+    if _CLIENT is not None and not _CLIENT.is_closed:
+        await _CLIENT.aclose()
+    _CLIENT = None
@@ -1,11 +1,24 @@
-import httpx
-from typing import List, Dict, Any, Optional
+import orjson
+from typing import List, Dict, Any, Optional, AsyncGenerator
 from .base import AIService
+from .http import get_shared_client
+from .openai_batch import OpenAIBatchMixin
 
 
-class MoonshotService(AIService):
+class MoonshotService(OpenAIBatchMixin, AIService):
     """Moonshot (Kimi) AI Service - OpenAI compatible API"""
 
+    provider_name = "moonshot"
+
+    def __init__(self, api_key: str, model: str, base_url: str = None):
+        super().__init__(api_key, model, base_url)
+        # Constant per instance — no per-call dict/f-string rebuilds
+        self._url = f"{self.base_url}/chat/completions"
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+
     async def chat(
         self,
         messages: List[Dict[str, Any]],
@@ -18,11 +31,6 @@ class MoonshotService(AIService):
             if isinstance(msg.get("content"), list):
                 raise Exception("Moonshot does not support vision/image content. Use claude-sonnet, chatgpt, or gemini-pro instead.")
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
         # Prepend system message if provided
         all_messages = []
         if system_prompt:
@@ -36,14 +44,14 @@ class MoonshotService(AIService):
             "messages": all_messages
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
+        client = get_shared_client()
+        response = await client.post(
+            self._url,
+            headers=self._headers,
+            content=orjson.dumps(payload)
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
 
         return {
             "content": data["choices"][0]["message"]["content"],
@@ -54,3 +62,43 @@ class MoonshotService(AIService):
             },
             "provider": "moonshot"
         }
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7
+    ) -> AsyncGenerator[str, None]:
+        if system_prompt:
+            all_messages = [{"role": "system", "content": system_prompt}, *messages]
+        else:
+            all_messages = list(messages)
+
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": all_messages,
+            "stream": True
+        }
+
+        client = get_shared_client()
+        async with client.stream(
+            "POST", self._url, headers=self._headers, content=orjson.dumps(payload)
+        ) as response:
+            if response.status_code != 200:
+                error_text = await response.aread()
+                raise Exception(f"Moonshot API error {response.status_code}: {error_text.decode()[:500]}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data_str = line[6:]
+                if data_str == "[DONE]":
+                    break
+                chunk = orjson.loads(data_str)
+                delta = chunk.get("choices", [{}])[0].get("delta", {})
+                text = delta.get("content")
+                if text:
+                    yield text
@@ -0,0 +1,149 @@
+"""Batch submission over the OpenAI-compatible /batches endpoints.
+
+Moonshot and Perplexity speak the OpenAI REST dialect; providers on that
+dialect generally accept batch jobs (JSONL upload → /batches → poll →
+download) at reduced cost for latency-tolerant workloads. Providers that
+don't implement the endpoints 404 on the first call, and the batch falls
+back transparently to concurrency-limited chat_many().
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Union
+
+import httpx
+import orjson
+
+from .http import get_shared_client
+
+logger = logging.getLogger(__name__)
+
+_POLL_INITIAL_S = 2.0
+_POLL_MAX_S = 60.0
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class OpenAIBatchMixin:
+    """chat_batch() for services speaking the OpenAI-compatible REST API"""
+
+    # Overridden by services for the "provider" field of result dicts
+    provider_name = ""
+
+    async def chat_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        completion_window: str = "24h"
+    ) -> List[Union[Dict[str, Any], BaseException]]:
+        """
+        Run many chat requests as one provider-side batch job.
+
+        Args:
+            requests: List of kwargs dicts for chat() (messages, system_prompt, ...)
+            completion_window: Provider-side deadline for the job
+
+        Returns:
+            Results in input order, same shape as chat() returns; a failed
+            row yields its exception instead of aborting the whole batch
+            (same contract as chat_many).
+        """
+        try:
+            return await self._chat_batch_api(requests, completion_window)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logger.info("[BATCH] %s has no /batches endpoint, falling back to chat_many",
+                            self.base_url)
+                return await self.chat_many(requests)
+            raise
+
+    async def _chat_batch_api(self, requests, completion_window):
+        client = get_shared_client()
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        # One JSONL line per request; custom_id carries the input index so
+        # results can be reordered after download.
+        lines = []
+        for i, req in enumerate(requests):
+            messages = req["messages"]
+            system_prompt = req.get("system_prompt")
+            if system_prompt:
+                messages = [{"role": "system", "content": system_prompt}, *messages]
+            lines.append(orjson.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": messages,
+                    "max_tokens": req.get("max_tokens", 4096),
+                    "temperature": req.get("temperature", 0.7),
+                },
+            }))
+        jsonl = b"\n".join(lines) + b"\n"
+
+        upload = await client.post(
+            f"{self.base_url}/files",
+            headers=headers,
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", jsonl, "application/jsonl")},
+        )
+        upload.raise_for_status()
+        input_file_id = orjson.loads(upload.content)["id"]
+
+        created = await client.post(
+            f"{self.base_url}/batches",
+            headers={**headers, "Content-Type": "application/json"},
+            content=orjson.dumps({
+                "input_file_id": input_file_id,
+                "endpoint": "/v1/chat/completions",
+                "completion_window": completion_window,
+            }),
+        )
+        created.raise_for_status()
+        batch = orjson.loads(created.content)
+
+        # Poll with exponential backoff until the job reaches a terminal state
+        delay = _POLL_INITIAL_S
+        while batch.get("status") not in _TERMINAL_STATUSES:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _POLL_MAX_S)
+            poll = await client.get(f"{self.base_url}/batches/{batch['id']}", headers=headers)
+            poll.raise_for_status()
+            batch = orjson.loads(poll.content)
+
+        if batch.get("status") != "completed":
+            raise Exception(f"Batch {batch.get('id')} ended as {batch.get('status')}")
+
+        output = await client.get(
+            f"{self.base_url}/files/{batch['output_file_id']}/content",
+            headers=headers,
+        )
+        output.raise_for_status()
+
+        results: List[Any] = [None] * len(requests)
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            row = orjson.loads(line)
+            idx = int(row["custom_id"])
+            error = row.get("error")
+            body = (row.get("response") or {}).get("body") or {}
+            if error or not body:
+                # Mirror chat_many: a failed row yields its exception, not
+                # a fake empty-content success.
+                results[idx] = Exception(f"Batch request {idx} failed: {error or 'no response body'}")
+                continue
+            choice = (body.get("choices") or [{}])[0]
+            usage = body.get("usage") or {}
+            results[idx] = {
+                "content": (choice.get("message") or {}).get("content", ""),
+                "model": body.get("model", self.model),
+                "usage": {
+                    "input_tokens": usage.get("prompt_tokens", 0),
+                    "output_tokens": usage.get("completion_tokens", 0),
+                },
+                "provider": self.provider_name,
+            }
+        # Rows the output file never mentioned failed provider-side too
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = Exception(f"Batch request {i} missing from output file")
+        return results
@@ -1,11 +1,27 @@
-import httpx
-from typing import List, Dict, Any, Optional
+import logging
+import orjson
+from typing import List, Dict, Any, Optional, AsyncGenerator
 from .base import AIService
+from .http import get_shared_client
+from .openai_batch import OpenAIBatchMixin
 
+logger = logging.getLogger(__name__)
 
-class PerplexityService(AIService):
+
+class PerplexityService(OpenAIBatchMixin, AIService):
     """Perplexity AI Service - OpenAI compatible API"""
 
+    provider_name = "perplexity"
+
+    def __init__(self, api_key: str, model: str, base_url: str = None):
+        super().__init__(api_key, model, base_url)
+        # Constant per instance — no per-call dict/f-string rebuilds
+        self._url = f"{self.base_url}/chat/completions"
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+
     async def chat(
         self,
         messages: List[Dict[str, Any]],
@@ -18,11 +34,6 @@ class PerplexityService(AIService):
             if isinstance(msg.get("content"), list):
                 raise Exception("Perplexity does not support vision/image content. Use claude-sonnet, chatgpt, or gemini-pro instead.")
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
         # Prepend system message if provided
         all_messages = []
         if system_prompt:
@@ -36,38 +47,25 @@ class PerplexityService(AIService):
             "messages": all_messages
         }
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
-
-        # 전체 응답 디버그 로깅
-        import logging
-        import json
-        logging.warning(f"[Perplexity] TOP-LEVEL KEYS: {list(data.keys())}")
-        if "choices" in data and data["choices"]:
-            choice = data["choices"][0]
-            logging.warning(f"[Perplexity] CHOICE KEYS: {list(choice.keys())}")
-            if "message" in choice:
-                logging.warning(f"[Perplexity] MESSAGE KEYS: {list(choice['message'].keys())}")
+        client = get_shared_client()
+        response = await client.post(
+            self._url,
+            headers=self._headers,
+            content=orjson.dumps(payload)
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
 
         # citations 추출 - Perplexity API는 citations를 최상위 레벨에 반환
+        # (older responses nested them under choices[0] / message)
         citations = data.get("citations", [])
-        logging.warning(f"[Perplexity] Top-level citations: {citations[:3] if citations else 'EMPTY'}")
-
-        # 대체 위치들도 확인
         if not citations:
             citations = data.get("choices", [{}])[0].get("citations", [])
-            logging.warning(f"[Perplexity] choices[0].citations: {citations[:3] if citations else 'EMPTY'}")
         if not citations:
             citations = data.get("choices", [{}])[0].get("message", {}).get("citations", [])
-            logging.warning(f"[Perplexity] message.citations: {citations[:3] if citations else 'EMPTY'}")
 
-        logging.warning(f"[Perplexity] FINAL citations count: {len(citations)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[Perplexity] keys=%s citations=%d", list(data.keys()), len(citations))
 
         return {
             "content": data["choices"][0]["message"]["content"],
@@ -79,3 +77,44 @@ class PerplexityService(AIService):
             "provider": "perplexity",
             "citations": citations
         }
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        system_prompt: Optional[str] = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7
+    ) -> AsyncGenerator[str, None]:
+        """Stream response text deltas via SSE (citations are not streamed)"""
+        if system_prompt:
+            all_messages = [{"role": "system", "content": system_prompt}, *messages]
+        else:
+            all_messages = list(messages)
+
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": all_messages,
+            "stream": True
+        }
+
+        client = get_shared_client()
+        async with client.stream(
+            "POST", self._url, headers=self._headers, content=orjson.dumps(payload)
+        ) as response:
+            if response.status_code != 200:
+                error_text = await response.aread()
+                raise Exception(f"Perplexity API error {response.status_code}: {error_text.decode()[:500]}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data_str = line[6:]
+                if data_str == "[DONE]":
+                    break
+                chunk = orjson.loads(data_str)
+                delta = chunk.get("choices", [{}])[0].get("delta", {})
+                text = delta.get("content")
+                if text:
+                    yield text
@@ -4,7 +4,13 @@ import logging
 from datetime import datetime, timezone
 from typing import Optional
 
-from .config import USE_POSTGRES, _get_pg_connection, _get_sqlite_connection
+from .config import (
+    USE_POSTGRES,
+    _get_pg_connection,
+    _get_sqlite_connection,
+    _read_connection,
+    _SQLITE_WRITE_LOCK,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,14 +36,17 @@ def init_usage_table():
         # PostgreSQL uses SERIAL for auto-increment
         sql = sql.replace("INTEGER PRIMARY KEY {autoincrement}", "SERIAL PRIMARY KEY")
         conn = _get_pg_connection()
+        conn.cursor().execute(sql)
+        conn.commit()
+        conn.close()
     else:
         sql = sql.replace("{autoincrement}", "AUTOINCREMENT")
-        conn = _get_sqlite_connection()
-
-    cursor = conn.cursor()
-    cursor.execute(sql)
-    conn.commit()
-    conn.close()
+        # Shared connection — hold the write lock so the DDL + commit can't
+        # interleave with a config transaction on another thread.
+        with _SQLITE_WRITE_LOCK:
+            conn = _get_sqlite_connection()
+            conn.cursor().execute(sql)
+            conn.commit()
 
 
 def log_usage(
@@ -62,17 +71,21 @@ def log_usage(
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             ''', (now, provider, model, input_tokens, output_tokens, elapsed_ms,
                   1 if success else 0, error_message, caller))
+            conn.commit()
+            conn.close()
         else:
-            conn = _get_sqlite_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO usage_logs (timestamp, provider, model, input_tokens, output_tokens, elapsed_ms, success, error_message, caller)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (now, provider, model, input_tokens, output_tokens, elapsed_ms,
-                  1 if success else 0, error_message, caller))
-
-        conn.commit()
-        conn.close()
+            # Shared connection — the lock keeps this INSERT + commit from
+            # landing inside a config transaction open on another thread
+            # (which would commit it half-done).
+            with _SQLITE_WRITE_LOCK:
+                conn = _get_sqlite_connection()
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO usage_logs (timestamp, provider, model, input_tokens, output_tokens, elapsed_ms, success, error_message, caller)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (now, provider, model, input_tokens, output_tokens, elapsed_ms,
+                      1 if success else 0, error_message, caller))
+                conn.commit()
     except Exception as e:
         logger.error(f"[USAGE LOG ERROR] {e}")
 
@@ -81,10 +94,20 @@ def get_usage_stats(days: int = 7, provider: Optional[str] = None):
     """Get aggregated usage statistics."""
     if USE_POSTGRES:
         conn = _get_pg_connection()
+        try:
+            return _query_usage_stats(conn, days, provider)
+        finally:
+            conn.close()
+    with _read_connection() as conn:
+        return _query_usage_stats(conn, days, provider)
+
+
+def _query_usage_stats(conn, days: int, provider: Optional[str]):
+    """Run the stats queries against an open connection."""
+    if USE_POSTGRES:
         date_filter = f"timestamp >= (NOW() - INTERVAL '{days} days')::text"
         placeholder = "%s"
     else:
-        conn = _get_sqlite_connection()
         date_filter = f"timestamp >= datetime('now', '-{days} days')"
         placeholder = "?"
 
@@ -155,8 +178,6 @@ def get_usage_stats(days: int = 7, provider: Optional[str] = None):
         "avg_elapsed_ms": row[3]
     }
 
-    conn.close()
-
     return {
         "period_days": days,
         "total": total,
@@ -169,9 +190,16 @@ def get_recent_logs(limit: int = 50):
     """Get recent usage log entries."""
     if USE_POSTGRES:
         conn = _get_pg_connection()
-    else:
-        conn = _get_sqlite_connection()
+        try:
+            return _query_recent_logs(conn, limit)
+        finally:
+            conn.close()
+    with _read_connection() as conn:
+        return _query_recent_logs(conn, limit)
 
+
+def _query_recent_logs(conn, limit: int):
+    """Fetch the newest usage rows from an open connection."""
     cursor = conn.cursor()
     cursor.execute('''
         SELECT timestamp, provider, model, input_tokens, output_tokens, elapsed_ms, success, error_message, caller
@@ -182,7 +210,4 @@ def get_recent_logs(limit: int = 50):
 
     columns = ["timestamp", "provider", "model", "input_tokens", "output_tokens",
                "elapsed_ms", "success", "error_message", "caller"]
-    logs = [dict(zip(columns, row)) for row in cursor.fetchall()]
-
-    conn.close()
-    return logs
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]